@@ -7,6 +7,11 @@ Creates a scale ammo can style bullet collector with separate lid.
 import trimesh
 import numpy as np
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "scripts"))
+import tessellation  # noqa: E402
+from part_export import export_part  # noqa: E402
 
 
 def create_ammo_can_base(length=40.0, width=30.0, height=25.0, wall_thickness=2.0):
@@ -42,12 +47,12 @@ def create_handle(length=30.0, diameter=3.0):
     Create a handle for the lid.
     """
     post_height = 10.0
-    post = trimesh.creation.cylinder(radius=diameter / 2, height=post_height)
+    post = tessellation.cylinder(radius=diameter / 2, height=post_height)
     post1 = post.copy()
     post2 = post.copy()
     post1.apply_translation([-length / 2, 0, 0])
     post2.apply_translation([length / 2, 0, 0])
-    bar = trimesh.creation.cylinder(radius=diameter / 2, height=length)
+    bar = tessellation.cylinder(radius=diameter / 2, height=length)
     bar.apply_translation([0, 0, post_height / 2])
     bar.apply_transform(trimesh.transformations.rotation_matrix(np.pi / 2, [0, 1, 0]))
     handle = trimesh.util.concatenate([post1, post2, bar])
@@ -78,6 +83,7 @@ def main():
     print("Creating handle...")
     handle = create_handle(length=base_length - 10)
     handle.apply_translation([0, 0, 5.0])
+    tessellation.report("handle")
 
     lid_with_handle = lid.union(handle)
 
@@ -92,13 +98,14 @@ def main():
     lid_stl = os.path.join(output_dir, "bullet_collector_lid.stl")
 
     print(f"Exporting base to {base_stl}")
-    base.export(base_stl)
+    base = export_part(base, base_stl)
     print(f"Exporting lid to {lid_stl}")
-    lid_with_handle.export(lid_stl)
+    lid_with_handle = export_part(lid_with_handle, lid_stl)
 
+    # The parts overlap in the assembly, so it is not repaired as one mesh
     combined = trimesh.util.concatenate([base, lid_with_handle])
     combined_stl = os.path.join(output_dir, "bullet_collector_combined.stl")
-    combined.export(combined_stl)
+    export_part(combined, combined_stl, repair=False)
     print(f"Exported combined model to {combined_stl}")
 
     print("Design complete.")
@@ -7,6 +7,13 @@ Creates a scale ammo can with swing latches, lid catches, and truck mounting poi
 import trimesh
 import numpy as np
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "scripts"))
+import tessellation  # noqa: E402
+from fit_check import check_fit, format_report  # noqa: E402
+from part_export import export_part  # noqa: E402
+from threemf import write_3mf  # noqa: E402
 
 
 def create_ammo_can_base(length=40.0, width=30.0, height=25.0, wall_thickness=2.0):
@@ -30,7 +37,7 @@ def create_latch_pin_hole(base, position, pin_diameter=1.5, pin_length=4.0):
     Create a cylindrical hole for latch pivot pin.
     """
     # Create pin cylinder (horizontal along X axis)
-    pin = trimesh.creation.cylinder(radius=pin_diameter / 2, height=pin_length)
+    pin = tessellation.cylinder(radius=pin_diameter / 2, height=pin_length)
     pin.apply_transform(trimesh.transformations.rotation_matrix(np.pi / 2, [0, 1, 0]))
     pin.apply_translation(position)
     # Subtract pin from base to create hole
@@ -49,7 +56,7 @@ def create_swing_latch(
     body = trimesh.creation.box([length, width, thickness])
 
     # Create pin hole in latch
-    pin_hole = trimesh.creation.cylinder(radius=pin_diameter / 2, height=width + 0.2)
+    pin_hole = tessellation.cylinder(radius=pin_diameter / 2, height=width + 0.2)
     pin_hole.apply_transform(
         trimesh.transformations.rotation_matrix(np.pi / 2, [0, 0, 1])
     )
@@ -62,7 +69,7 @@ def create_swing_latch(
     body = body.union(catch)
 
     # Create separate pin
-    pin = trimesh.creation.cylinder(radius=pin_diameter / 2, height=pin_length)
+    pin = tessellation.cylinder(radius=pin_diameter / 2, height=pin_length)
     pin.apply_transform(trimesh.transformations.rotation_matrix(np.pi / 2, [0, 0, 1]))
 
     return body, pin
@@ -109,13 +116,13 @@ def create_handle(length=30.0, diameter=3.0):
     Create a handle for the lid.
     """
     post_height = 10.0
-    post = trimesh.creation.cylinder(radius=diameter / 2, height=post_height)
+    post = tessellation.cylinder(radius=diameter / 2, height=post_height)
     post1 = post.copy()
     post2 = post.copy()
     post1.apply_translation([-length / 2, 0, 0])
     post2.apply_translation([length / 2, 0, 0])
 
-    bar = trimesh.creation.cylinder(radius=diameter / 2, height=length)
+    bar = tessellation.cylinder(radius=diameter / 2, height=length)
     bar.apply_translation([0, 0, post_height / 2])
     bar.apply_transform(trimesh.transformations.rotation_matrix(np.pi / 2, [0, 1, 0]))
 
@@ -144,7 +151,7 @@ def add_mounting_points(base, length=40.0, width=30.0, height=25.0):
     )
 
     # Add screw holes to tabs
-    screw_hole = trimesh.creation.cylinder(radius=1.0, height=tab_height + 0.2)
+    screw_hole = tessellation.cylinder(radius=1.0, height=tab_height + 0.2)
 
     front_hole = screw_hole.copy()
     front_hole.apply_translation([0, -width / 2 + tab_width / 2, -height / 2])
@@ -185,6 +192,7 @@ def main():
 
     print("Adding mounting points for truck...")
     base = add_mounting_points(base, base_length, base_width, base_height)
+    tessellation.report("base")
 
     print("Creating swing latches...")
     right_latch, right_pin = create_swing_latch()
@@ -205,6 +213,7 @@ def main():
     left_pin.apply_translation(
         [-base_length / 2 + 4, base_width / 2, base_height / 2 - 2]
     )
+    tessellation.report("latches")
 
     print("Creating lid with catch notches...")
     lid = create_lid_with_catches(base_length, base_width, lid_height=5.0)
@@ -213,6 +222,7 @@ def main():
     handle = create_handle(length=base_length - 10)
     handle.apply_translation([0, 0, 5.0])
     lid_with_handle = lid.union(handle)
+    tessellation.report("lid")
 
     # Export all parts
     output_dir = os.path.dirname(os.path.abspath(__file__))
@@ -221,39 +231,57 @@ def main():
 
     # Base assembly (base alone)
     base_stl = os.path.join(output_dir, "advanced_base.stl")
-    base.export(base_stl)
+    base = export_part(base, base_stl)
     print(f"  Base: {base_stl}")
 
     # Lid assembly
     lid_stl = os.path.join(output_dir, "advanced_lid.stl")
-    lid_with_handle.export(lid_stl)
+    lid_with_handle = export_part(lid_with_handle, lid_stl)
     print(f"  Lid: {lid_stl}")
 
     # Latches (right and left)
     right_latch_stl = os.path.join(output_dir, "advanced_latch_right.stl")
-    right_latch.export(right_latch_stl)
+    right_latch = export_part(right_latch, right_latch_stl)
     print(f"  Right latch: {right_latch_stl}")
 
     left_latch_stl = os.path.join(output_dir, "advanced_latch_left.stl")
-    left_latch.export(left_latch_stl)
+    left_latch = export_part(left_latch, left_latch_stl)
     print(f"  Left latch: {left_latch_stl}")
 
     # Pins
     right_pin_stl = os.path.join(output_dir, "advanced_pin_right.stl")
-    right_pin.export(right_pin_stl)
+    right_pin = export_part(right_pin, right_pin_stl)
     print(f"  Right pin: {right_pin_stl}")
 
     left_pin_stl = os.path.join(output_dir, "advanced_pin_left.stl")
-    left_pin.export(left_pin_stl)
+    left_pin = export_part(left_pin, left_pin_stl)
     print(f"  Left pin: {left_pin_stl}")
 
-    # Combined assembly for visualization
-    combined = trimesh.util.concatenate(
-        [base, lid_with_handle, right_latch, left_latch, right_pin, left_pin]
+    # Combined assembly for visualization; identical latches and pins are
+    # stored once and placed by build item transforms
+    combined_3mf = os.path.join(output_dir, "advanced_combined.3mf")
+    unique, items = write_3mf(
+        [
+            ("base", base),
+            ("lid", lid_with_handle),
+            ("latch_right", right_latch),
+            ("latch_left", left_latch),
+            ("pin_right", right_pin),
+            ("pin_left", left_pin),
+        ],
+        combined_3mf,
     )
-    combined_stl = os.path.join(output_dir, "advanced_combined.stl")
-    combined.export(combined_stl)
-    print(f"  Combined assembly: {combined_stl}")
+    print(f"  Combined assembly: {combined_3mf} ({unique} meshes, {items} instances)")
+
+    # Fit check of mating parts in assembled pose
+    print("\nFit check:")
+    for name, part, mate in [
+        ("Right pin / base", right_pin, base),
+        ("Left pin / base", left_pin, base),
+        ("Right pin / right latch", right_pin, right_latch),
+        ("Left pin / left latch", left_pin, left_latch),
+    ]:
+        print(f"  {format_report(name, check_fit(part, mate))}")
 
     print("\nDesign complete!")
     print("\nAssembly instructions:")
@@ -1,32 +1,15 @@
+import argparse
 import trimesh
 import numpy as np
 import os
+import sys
 
-def create_garage():
-    # --- Dimensions (mm) ---
-    # Car dimensions (approx 20cm x 8cm x 4cm)
-    car_l = 200
-    car_w = 80
-    car_h = 40
-
-    # Design parameters
-    wall_th = 5.0
-    clearance = 20.0  # Total internal clearance (width/length)
-    height_clearance = 40.0 # Extra height for hand access/door mechanism
-
-    # Internal dimensions
-    int_w = car_w + clearance
-    int_h = car_h + height_clearance
-    int_l = car_l + clearance
-
-    # External dimensions
-    ext_w = int_w + 2 * wall_th
-    ext_h = int_h + wall_th # Roof only, no floor
-    ext_l = int_l + wall_th # Back wall only, front open
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "scripts"))
+import tessellation  # noqa: E402
+from part_tasks import run_parts  # noqa: E402
 
-    print(f"Generating Garage with External Dimensions: {ext_w}x{ext_l}x{ext_h} mm")
-
-    # --- 1. Garage Body ---
+def build_structure(ext_w, ext_l, ext_h, int_w, int_h, wall_th, door_th, slot_y_pos):
+    """Garage body: walls and roof with the door slots cut in."""
     
     # Create outer solid block
     # Center at origin initially
@@ -75,13 +58,9 @@ def create_garage():
     # "Garage door opens upwards".
     # Simplest meaningful printable mechanism: Vertical slots in the side walls at the front opening.
     # Slot size: 
-    door_th = 4.0
     slot_depth = 2.5 # Into the wall
     slot_width = door_th + 1.0 # Tolerance
     
-    # Slot location: Just inside the front opening (Y approx 5mm from front?)
-    slot_y_pos = 5.0 
-    
     left_slot = trimesh.creation.box([slot_depth*2, slot_width, int_h * 2]) # Tall enough to cut through
     # Position Left Slot:
     # X: -int_w/2 - slot_depth/2 + epsilon?
@@ -99,15 +78,10 @@ def create_garage():
 
     # Combine subtractions
     # Garage = Outer - Inner - Slots
-    garage = trimesh.boolean.difference([outer_box, inner_box, left_slot, right_slot, top_slot])
+    return trimesh.boolean.difference([outer_box, inner_box, left_slot, right_slot, top_slot])
 
-    # --- 2. Garage Door ---
-    
-    # Door dimensions
-    # Width: int_w + 2*slot_depth_engagement - tolerance
-    # Let's say it engages 2mm into each slot (which is 2.5mm deep).
-    # Width = int_w + 4mm - 1mm(tolerance)
-    door_print_w = int_w + 3.0
+def build_door(int_w, ext_h, door_th, door_print_w):
+    """Garage door panel with three windows."""
     door_print_h = ext_h + 5.0 # Taller than roof to grab from top
     
     door_panel = trimesh.creation.box([door_print_w, door_th, door_print_h])
@@ -129,9 +103,10 @@ def create_garage():
         w.apply_translation([x_off, 0, win_z])
         windows.append(w)
         
-    door_final = trimesh.boolean.difference([door_panel] + windows)
+    return trimesh.boolean.difference([door_panel] + windows)
 
-    # --- 3. Garage Base ---
+def build_base(ext_w, ext_l, int_w, wall_th, door_th, door_print_w, slot_y_pos):
+    """Base plate with ramp, wall grooves and friction nubs."""
     base_h = 6.0
     groove_depth = 4.0
     tol = 0.2  # Tolerance for fit
@@ -211,12 +186,12 @@ def create_garage():
         # Result: A bump sticking into the groove. Perfect.
         
         # Left Nubs
-        n1 = trimesh.creation.icosphere(radius=nub_r)
+        n1 = tessellation.icosphere(nub_r)
         n1.apply_translation([-int_w/2, y, nub_z])
         nubs.append(n1)
         
         # Right Nubs (Mirror)
-        n2 = trimesh.creation.icosphere(radius=nub_r)
+        n2 = tessellation.icosphere(nub_r)
         n2.apply_translation([int_w/2, y, nub_z])
         nubs.append(n2)
         
@@ -229,24 +204,63 @@ def create_garage():
     # Correct.
     
     base_solid = trimesh.boolean.union([base_plate, ramp] + nubs)
-    base_final = trimesh.boolean.difference([base_solid, left_groove, right_groove, back_groove, door_groove])
+    return trimesh.boolean.difference([base_solid, left_groove, right_groove, back_groove, door_groove])
+
+def create_garage(workers=None):
+    # --- Dimensions (mm) ---
+    # Car dimensions (approx 20cm x 8cm x 4cm)
+    car_l = 200
+    car_w = 80
+    car_h = 40
+
+    # Design parameters
+    wall_th = 5.0
+    clearance = 20.0  # Total internal clearance (width/length)
+    height_clearance = 40.0 # Extra height for hand access/door mechanism
+
+    # Internal dimensions
+    int_w = car_w + clearance
+    int_h = car_h + height_clearance
+    int_l = car_l + clearance
+
+    # External dimensions
+    ext_w = int_w + 2 * wall_th
+    ext_h = int_h + wall_th # Roof only, no floor
+    ext_l = int_l + wall_th # Back wall only, front open
+
+    print(f"Generating Garage with External Dimensions: {ext_w}x{ext_l}x{ext_h} mm")
+
+    # Door and slot parameters shared by the body, door and base
+    door_th = 4.0
+    # Slot location: Just inside the front opening (Y approx 5mm from front?)
+    slot_y_pos = 5.0
+    # Door dimensions
+    # Width: int_w + 2*slot_depth_engagement - tolerance
+    # Let's say it engages 2mm into each slot (which is 2.5mm deep).
+    # Width = int_w + 4mm - 1mm(tolerance)
+    door_print_w = int_w + 3.0
 
-    # --- 4. Export ---
+    # --- Export ---
+    # The three parts share no intermediate results, so they are built and
+    # exported in parallel
     output_dir = os.path.dirname(os.path.abspath(__file__))
     
     garage_path = os.path.join(output_dir, 'garage_structure.stl')
     door_path = os.path.join(output_dir, 'garage_door.stl')
     base_path = os.path.join(output_dir, 'garage_base.stl')
     
-    print(f"Exporting to {garage_path}...")
-    garage.export(garage_path)
-    
-    print(f"Exporting to {door_path}...")
-    door_final.export(door_path)
-    
-    print(f"Exporting to {base_path}...")
-    base_final.export(base_path)
+    print(f"Exporting to {output_dir}...")
+    run_parts([
+        (garage_path, build_structure,
+         (ext_w, ext_l, ext_h, int_w, int_h, wall_th, door_th, slot_y_pos)),
+        (door_path, build_door, (int_w, ext_h, door_th, door_print_w)),
+        (base_path, build_base,
+         (ext_w, ext_l, int_w, wall_th, door_th, door_print_w, slot_y_pos)),
+    ], workers=workers)
     print("Done.")
 
 if __name__ == "__main__":
-    create_garage()
+    parser = argparse.ArgumentParser(description="Generate the garage STL files.")
+    parser.add_argument("--workers", type=int, help="parallel part builds (default: CPU count)")
+    args = parser.parse_args()
+    create_garage(workers=args.workers)
@@ -1,8 +1,26 @@
+import argparse
 import trimesh
 import numpy as np
 import os
+import sys
 
-def create_garage():
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "scripts"))
+from part_tasks import run_parts  # noqa: E402
+
+def split_part(body, mask):
+    """Keep the part of the body inside the mask box."""
+    # Using intersection is cleaner than difference for splitting usually
+    return trimesh.boolean.intersection([body, mask])
+
+def build_door(door_w_total, door_th, door_h_total):
+    """Solid sliding door panel."""
+    door_panel = trimesh.creation.box([door_w_total, door_th, door_h_total])
+    # Center at origin for export
+    
+    # Solid Door (No Windows) - User requested removing "rectangular holes"
+    return door_panel
+
+def create_garage(workers=None):
     # --- Dimensions (mm) ---
     # Robot Dimensions from README: 10.3 x 7.5 x 1.8 inches -> 262 x 191 x 46 mm
     robot_l = 262.0
@@ -226,11 +244,6 @@ def create_garage():
     back_mask = trimesh.creation.box([mask_size, mask_size, mask_size])
     back_mask.apply_translation([0, split_y + mask_size/2, 0])
     
-    # Perform Split
-    # Using intersection is cleaner than difference for splitting usually
-    garage_front = trimesh.boolean.intersection([main_body, front_mask])
-    garage_back = trimesh.boolean.intersection([main_body, back_mask])
-
     # --- 2. Garage Door ---
     # Dimensions:
     # Height: int_h + 2*groove_depth - tolerance
@@ -241,12 +254,6 @@ def create_garage():
     # User requested exactly 220mm width.
     door_w_total = 220.0
     
-    door_panel = trimesh.creation.box([door_w_total, door_th, door_h_total])
-    # Center at origin for export
-    
-    # Solid Door (No Windows) - User requested removing "rectangular holes"
-    door_final = door_panel
-
     # --- Export ---
     output_dir = os.path.dirname(os.path.abspath(__file__))
     
@@ -255,16 +262,19 @@ def create_garage():
     back_path = os.path.join(output_dir, 'lego_robot_home_base_part2_back.stl')
     door_path = os.path.join(output_dir, 'lego_robot_home_base_door.stl')
     
-    print(f"Exporting Front Part to {front_path}...")
-    garage_front.export(front_path)
-    
-    print(f"Exporting Back Part to {back_path}...")
-    garage_back.export(back_path)
-    
-    print(f"Exporting Door to {door_path}...")
-    door_final.export(door_path)
+    # The front and back splits of the body and the door are independent,
+    # so they are built and exported in parallel
+    print(f"Exporting Front Part, Back Part and Door to {output_dir}...")
+    run_parts([
+        (front_path, split_part, (main_body, front_mask)),
+        (back_path, split_part, (main_body, back_mask)),
+        (door_path, build_door, (door_w_total, door_th, door_h_total)),
+    ], workers=workers)
     
     print("Generation Complete.")
 
 if __name__ == "__main__":
-    create_garage()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate the garage STL files.")
+    parser.add_argument("--workers", type=int, help="parallel part builds (default: CPU count)")
+    args = parser.parse_args()
+    create_garage(workers=args.workers)
\ No newline at end of file
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Build a static web gallery of every model in the repository.
+
+Each STL/.stlz/3MF is converted to a GLB with merged vertices, 16-bit
+quantized positions (KHR_mesh_quantization) and no per-vertex normals.
+No glTF compression extension (meshopt, Draco) is used, since neither
+encoder is a dependency; instead faces are ordered along a space-filling
+curve so nearby data repeats, and the GLB is written gzip-compressed as
+models/<hash>.glb.gz, typically about a sixth of the STL size. The page
+decompresses it in the browser (DecompressionStream), so any static file
+server works as is; a server that adds `Content-Encoding: gzip` for .gz
+files is handled too. The generated index.html shows lazy-loaded PNG
+thumbnails and only fetches a model (and the viewer itself) when its card
+is opened.
+
+Builds are incremental: outputs are named by the source content hash and
+listed in manifest.json, so unchanged models are not converted again. For
+Git LFS pointer files the hash is the pointer's OID, so unchanged models
+need no fetch; a changed one is fetched on its own before converting.
+
+Example:
+    python3 scripts/build_gallery.py --output gallery
+    python3 -m http.server -d gallery
+"""
+import argparse
+import gzip
+import html
+import json
+import os
+import shutil
+import struct
+
+import numpy as np
+import trimesh
+
+import lfs
+from stl_archive import SUFFIX as STLZ_SUFFIX, load_mesh
+
+MODEL_SUFFIXES = ('.stl', STLZ_SUFFIX, '.3mf')
+SKIP_DIRS = {'.git', '__pycache__', 'scripts', 'gallery'}
+
+MODEL_VIEWER = 'https://ajax.googleapis.com/ajax/libs/model-viewer/3.5.0/model-viewer.min.js'
+
+# glTF component types
+UNSIGNED_SHORT = 5123
+UNSIGNED_INT = 5125
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+
+
+def _pad(data, fill):
+    return data + fill * (-len(data) % 4)
+
+
+def _spread_bits(x):
+    """
+    Interleave two zero bits after each of the low 10 bits of `x`.
+    """
+    x = (x | (x << 16)) & 0x030000FF
+    x = (x | (x << 8)) & 0x0300F00F
+    x = (x | (x << 4)) & 0x030C30C3
+    return (x | (x << 2)) & 0x09249249
+
+
+def _locality_order(mesh):
+    """
+    Reorder faces along a Morton (Z-order) curve through their centres and
+    number vertices by first use, so neighbouring faces and vertices are
+    close in the buffer and compress much better.
+    """
+    centers = mesh.triangles_center
+    low = centers.min(axis=0)
+    cell = (centers - low) / max(np.ptp(centers, axis=0).max(), 1e-9) * 1023
+    q = cell.astype(np.uint64)
+    key = _spread_bits(q[:, 0]) | (_spread_bits(q[:, 1]) << 1) | (_spread_bits(q[:, 2]) << 2)
+    faces = mesh.faces[np.argsort(key, kind='stable')]
+
+    used, first = np.unique(faces.ravel(), return_index=True)
+    order = used[np.argsort(first)]
+    remap = np.empty(len(mesh.vertices), dtype=np.int64)
+    remap[order] = np.arange(len(order))
+    return trimesh.Trimesh(mesh.vertices[order], remap[faces], process=False)
+
+
+def glb_bytes(mesh):
+    """
+    Encode a mesh as a GLB with 16-bit quantized positions.
+
+    Positions are stored as unnormalized UNSIGNED_SHORT grid coordinates and
+    the node matrix maps them back to model space, converted from millimetres
+    to glTF's metres.
+    """
+    mesh = mesh.copy()
+    mesh.merge_vertices()
+    mesh = _locality_order(mesh)
+    low, high = mesh.bounds
+    extent = np.where(high - low > 0, high - low, 1.0)
+    grid = np.round((mesh.vertices - low) / extent * 65535).astype(np.uint16)
+
+    if len(grid) < 65536:
+        index_type, indices = UNSIGNED_SHORT, mesh.faces.astype(np.uint16)
+    else:
+        index_type, indices = UNSIGNED_INT, mesh.faces.astype(np.uint32)
+    # Vertex attributes must be 4-byte aligned: pad each position to 8 bytes
+    padded = np.zeros((len(grid), 4), dtype=np.uint16)
+    padded[:, :3] = grid
+    index_bytes = _pad(indices.tobytes(), b'\0')
+    binary = index_bytes + padded.tobytes()
+
+    scale = extent / 65535 / 1000.0
+    matrix = [
+        scale[0], 0, 0, 0,
+        0, scale[1], 0, 0,
+        0, 0, scale[2], 0,
+        low[0] / 1000.0, low[1] / 1000.0, low[2] / 1000.0, 1,
+    ]
+    gltf = {
+        'asset': {'version': '2.0', 'generator': 'build_gallery.py'},
+        'extensionsUsed': ['KHR_mesh_quantization'],
+        'extensionsRequired': ['KHR_mesh_quantization'],
+        'scene': 0,
+        # Z-up (mm) to glTF Y-up (m)
+        'scenes': [{'nodes': [0]}],
+        'nodes': [
+            {'children': [1], 'rotation': [-0.7071068, 0, 0, 0.7071068]},
+            {'mesh': 0, 'matrix': [float(v) for v in matrix]},
+        ],
+        'meshes': [{'primitives': [{'attributes': {'POSITION': 1}, 'indices': 0}]}],
+        'buffers': [{'byteLength': len(binary)}],
+        'bufferViews': [
+            {'buffer': 0, 'byteOffset': 0, 'byteLength': indices.nbytes,
+             'target': ELEMENT_ARRAY_BUFFER},
+            {'buffer': 0, 'byteOffset': len(index_bytes), 'byteLength': padded.nbytes,
+             'byteStride': 8, 'target': ARRAY_BUFFER},
+        ],
+        'accessors': [
+            {'bufferView': 0, 'componentType': index_type, 'count': int(indices.size),
+             'type': 'SCALAR'},
+            {'bufferView': 1, 'componentType': UNSIGNED_SHORT, 'count': len(grid),
+             'type': 'VEC3', 'min': grid.min(axis=0).tolist(), 'max': grid.max(axis=0).tolist()},
+        ],
+    }
+    json_bytes = _pad(json.dumps(gltf, separators=(',', ':')).encode(), b' ')
+    length = 12 + 8 + len(json_bytes) + 8 + len(binary)
+    return b''.join([
+        struct.pack('<4sII', b'glTF', 2, length),
+        struct.pack('<I4s', len(json_bytes), b'JSON'), json_bytes,
+        struct.pack('<I4s', len(binary), b'BIN\0'), binary,
+    ])
+
+
+def find_models(root_dir):
+    base_dir = os.path.abspath(root_dir)
+    for root, dirs, files in os.walk(base_dir):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith('.'))
+        for filename in sorted(files):
+            if filename.lower().endswith(MODEL_SUFFIXES):
+                yield os.path.relpath(os.path.join(root, filename), base_dir)
+
+
+def _load(path):
+    if path.lower().endswith('.3mf'):
+        return trimesh.load(path, force='mesh')
+    return load_mesh(path)
+
+
+def _thumb(path, output_dir):
+    """
+    Copy the model's preview PNG into the gallery, named by its own hash so a
+    re-rendered preview replaces the old one; None if there is no preview.
+    """
+    png = os.path.splitext(path)[0] + '.png'
+    if not os.path.exists(png):
+        return None
+    thumb = f"thumbs/{lfs.content_id(png)[:16]}.png"
+    if not os.path.exists(os.path.join(output_dir, thumb)):
+        if lfs.read_pointer(png):
+            return None
+        shutil.copyfile(png, os.path.join(output_dir, thumb))
+    return thumb
+
+
+def build_entry(root_dir, rel_path, output_dir, previous):
+    """
+    Convert one model if its content changed; returns its manifest entry.
+    The thumbnail is picked up again on every run.
+    """
+    path = os.path.join(root_dir, rel_path)
+    digest = lfs.content_id(path)
+    glb_name = f"models/{digest[:16]}.glb.gz"
+    entry = previous.get(rel_path)
+    if entry and entry['hash'] == digest and os.path.exists(os.path.join(output_dir, glb_name)):
+        return dict(entry, thumb=_thumb(path, output_dir)), False
+
+    if lfs.read_pointer(path) and not lfs.fetch([path]):
+        raise ValueError('Git LFS object not available')
+    mesh = _load(path)
+    # mtime=0 keeps the output identical for identical models
+    data = gzip.compress(glb_bytes(mesh), compresslevel=9, mtime=0)
+    with open(os.path.join(output_dir, glb_name), 'wb') as f:
+        f.write(data)
+
+    entry = {
+        'hash': digest,
+        'glb': glb_name,
+        'glb_size': len(data),
+        'size': lfs.content_size(path),
+        'faces': len(mesh.faces),
+        'thumb': _thumb(path, output_dir),
+    }
+    return entry, True
+
+
+def _card(rel_path, entry):
+    name = html.escape(os.path.basename(rel_path))
+    folder = html.escape(os.path.dirname(rel_path))
+    if entry['thumb']:
+        thumb = f'<img loading="lazy" src="{entry["thumb"]}" alt="{name}">'
+    else:
+        thumb = '<div class="nothumb">no preview</div>'
+    return (
+        f'<figure data-glb="{entry["glb"]}">{thumb}'
+        f'<figcaption><b>{name}</b><br>{folder}<br>'
+        f'{entry["size"] / 1e6:.2f} MB source, {entry["glb_size"] / 1e6:.2f} MB GLB (gzip), '
+        f'{entry["faces"]} faces</figcaption></figure>'
+    )
+
+
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>3D Prints gallery</title>
+<style>
+body {{ font-family: sans-serif; margin: 1em; }}
+main {{ display: grid; grid-template-columns: repeat(auto-fill, minmax(260px, 1fr)); gap: 1em; }}
+figure {{ margin: 0; border: 1px solid #ccc; cursor: pointer; }}
+figure img, figure model-viewer, .nothumb {{ width: 100%; height: 200px; object-fit: contain; }}
+.nothumb {{ display: flex; align-items: center; justify-content: center; color: #888; }}
+figcaption {{ padding: 0.5em; font-size: 0.85em; word-break: break-all; }}
+</style>
+</head>
+<body>
+<h1>3D Prints gallery</h1>
+<p>Click a model to load it in the interactive viewer.</p>
+<main>
+{cards}
+</main>
+<script>
+let viewer = null;
+document.querySelectorAll('figure').forEach(card => card.addEventListener('click', async () => {{
+  if (card.querySelector('model-viewer')) return;
+  viewer = viewer || import('{viewer}');
+  const response = await fetch(card.dataset.glb);
+  let data = await response.arrayBuffer();
+  // Unless the server already decoded it, inflate the gzip stream here
+  const magic = new Uint8Array(data, 0, 2);
+  if (magic[0] === 0x1f && magic[1] === 0x8b) {{
+    const stream = new Blob([data]).stream().pipeThrough(new DecompressionStream('gzip'));
+    data = await new Response(stream).arrayBuffer();
+  }}
+  await viewer;
+  const mv = document.createElement('model-viewer');
+  mv.setAttribute('src', URL.createObjectURL(new Blob([data], {{type: 'model/gltf-binary'}})));
+  mv.setAttribute('camera-controls', '');
+  mv.setAttribute('auto-rotate', '');
+  const thumb = card.querySelector('img, .nothumb');
+  thumb.replaceWith(mv);
+}}));
+</script>
+</body>
+</html>
+"""
+
+
+def build_gallery(root_dir='.', output_dir='gallery'):
+    """
+    Convert new or changed models and rewrite index.html and manifest.json.
+    """
+    for sub in ('models', 'thumbs'):
+        os.makedirs(os.path.join(output_dir, sub), exist_ok=True)
+    manifest_path = os.path.join(output_dir, 'manifest.json')
+    previous = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            previous = json.load(f)
+
+    manifest = {}
+    for rel_path in find_models(root_dir):
+        try:
+            entry, converted = build_entry(root_dir, rel_path, output_dir, previous)
+        except Exception as e:
+            print(f"Error converting {rel_path}: {e}")
+            continue
+        manifest[rel_path] = entry
+        if converted:
+            print(f"Converted {rel_path} -> {entry['glb']}")
+
+    # Drop outputs no longer referenced by any model
+    used = {e['glb'] for e in manifest.values()} | {e['thumb'] for e in manifest.values()}
+    for sub in ('models', 'thumbs'):
+        for filename in os.listdir(os.path.join(output_dir, sub)):
+            if f"{sub}/{filename}" not in used:
+                os.remove(os.path.join(output_dir, sub, filename))
+
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    cards = '\n'.join(_card(p, e) for p, e in sorted(manifest.items()))
+    with open(os.path.join(output_dir, 'index.html'), 'w') as f:
+        f.write(PAGE.format(cards=cards, viewer=MODEL_VIEWER))
+    print(f"Gallery with {len(manifest)} models written to {output_dir}/index.html")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build a static web gallery of the models.')
+    parser.add_argument('root', nargs='?', default='.', help='repository root')
+    parser.add_argument('--output', default='gallery', help='output directory')
+    args = parser.parse_args()
+    build_gallery(args.root, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Clearance and interference check between mating parts in assembled pose.
+
+Both surfaces are sampled and a KD-tree over the mate's samples gives each
+point of the part a few nearby mate faces; the closest of them estimates its
+distance, and the side of that face tells whether it is inside the mate. No
+ray tests are needed for the bulk of the points, so a pair of small parts is
+checked in a fraction of a second. The closest and the deepest candidates
+are refined with exact closest-point queries, and points of one part lying
+inside the other are reported as interference.
+
+Example:
+    python3 scripts/fit_check.py advanced_pin_right.stl advanced_base.stl
+"""
+import argparse
+from collections import namedtuple
+
+import numpy as np
+import trimesh
+from scipy.spatial import cKDTree
+
+FitReport = namedtuple(
+    'FitReport',
+    [
+        'min_clearance',       # mm; negative is the deepest penetration found
+        'interference_volume',  # mm^3 of overlap, 0.0 if the parts do not touch
+        'face_distance',        # per-face signed distance from `part` to `mate`
+        'closest_points',       # (point on part, point on mate) at min clearance
+    ],
+)
+
+# Number of closest sample pairs refined with exact closest-point queries
+REFINE = 64
+# Mate samples whose faces give the first distance estimate of each point
+NEAREST = 8
+# Depth (mm) by which an estimate may exceed the deepest exact point
+# before it is refined as well
+TOLERANCE = 1e-3
+
+
+def _samples(mesh, count, seed):
+    """
+    Surface samples plus every face centre, with the face each came from.
+    """
+    points, faces = trimesh.sample.sample_surface(mesh, count, seed=seed)
+    points = np.vstack([points, mesh.triangles_center])
+    faces = np.concatenate([faces, np.arange(len(mesh.faces))])
+    return points, faces
+
+
+def _inside(mesh, points, closest, distance, triangle):
+    """
+    Whether points lie inside `mesh`, given their exact closest points: by
+    the side of the closest face, with a ray test only where the closest
+    point is on an edge or corner and the face alone does not decide.
+    """
+    along = np.einsum('ij,ij->i', points - closest, mesh.face_normals[triangle])
+    inside = along < 0
+    unclear = np.abs(along) < 0.99 * distance
+    if unclear.any():
+        inside[unclear] = mesh.contains(points[unclear])
+    return inside
+
+
+def check_fit(part, mate, samples=20000, seed=0):
+    """
+    Measure how `part` fits against `mate`; both must be in assembled pose.
+
+    Returns a FitReport. `face_distance` holds, for every face of `part`, the
+    smallest distance from its samples to the surface of `mate`, negative
+    where the face lies inside `mate`.
+    """
+    points, faces = _samples(part, samples, seed)
+    mate_points, mate_faces = _samples(mate, samples, seed + 1)
+
+    # Distance to the faces of the NEAREST mate samples (never less than
+    # the true distance), signed by the side of the closest of them
+    _, nearest = cKDTree(mate_points).query(points, k=NEAREST)
+    near_faces = mate_faces[nearest]
+    repeated = np.repeat(points, NEAREST, axis=0)
+    closest = trimesh.triangles.closest_point(mate.triangles[near_faces.ravel()], repeated)
+    distance = np.linalg.norm(repeated - closest, axis=1).reshape(-1, NEAREST)
+    pick = distance.argmin(axis=1)
+    rows = np.arange(len(points))
+    distance = distance[rows, pick]
+    closest = closest.reshape(-1, NEAREST, 3)[rows, pick]
+    near_faces = near_faces[rows, pick]
+    inside = np.einsum('ij,ij->i', points - closest, mate.face_normals[near_faces]) < 0
+    signed = np.where(inside, -distance, distance)
+
+    # Refine the closest candidates against the exact surface, then every
+    # point estimated deeper than the deepest exact one, until none is left:
+    # estimates only overstate the depth, so no unrefined point is deeper by
+    # more than TOLERANCE
+    exact = np.zeros(len(points), dtype=bool)
+    mate_point = closest.copy()
+    candidates = np.union1d(np.argsort(distance)[:REFINE], np.argsort(signed)[:REFINE])
+    while len(candidates):
+        mate_point[candidates], exact_distance, triangle = trimesh.proximity.closest_point(
+            mate, points[candidates])
+        inside[candidates] = _inside(mate, points[candidates], mate_point[candidates],
+                                     exact_distance, triangle)
+        signed[candidates] = np.where(inside[candidates], -exact_distance, exact_distance)
+        exact[candidates] = True
+        candidates = np.flatnonzero(~exact & (signed < signed[exact].min() - TOLERANCE))
+
+    face_distance = np.full(len(part.faces), np.inf)
+    np.minimum.at(face_distance, faces, signed)
+
+    best = int(np.argmin(signed))
+    interference = 0.0
+    if inside.any():
+        overlap = trimesh.boolean.intersection([part, mate])
+        interference = float(abs(overlap.volume)) if len(overlap.faces) else 0.0
+
+    return FitReport(
+        min_clearance=float(signed[best]),
+        interference_volume=interference,
+        face_distance=face_distance,
+        closest_points=(points[best], mate_point[best]),
+    )
+
+
+def format_report(name, report):
+    """
+    One-line summary of a FitReport.
+    """
+    status = 'INTERFERES' if report.interference_volume > 0 else 'ok'
+    return (f"{name}: min clearance {report.min_clearance:.3f} mm, "
+            f"interference {report.interference_volume:.3f} mm^3 [{status}]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check clearance between two mating parts.')
+    parser.add_argument('part', help='STL of the first part, in assembled pose')
+    parser.add_argument('mate', help='STL of the mating part, in assembled pose')
+    parser.add_argument('--samples', type=int, default=20000,
+                        help='surface samples per part (default: %(default)s)')
+    args = parser.parse_args()
+
+    part = trimesh.load(args.part, force='mesh')
+    mate = trimesh.load(args.mate, force='mesh')
+    report = check_fit(part, mate, samples=args.samples)
+    print(format_report(f"{args.part} / {args.mate}", report))
+    tight = np.count_nonzero(report.face_distance < 0.1)
+    print(f"  {tight} of {len(part.faces)} faces closer than 0.1 mm")
+
+
+if __name__ == '__main__':
+    main()
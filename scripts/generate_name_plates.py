@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Generate personalized copies of a base model with a name embossed on top.
+
+Example:
+    python3 scripts/generate_name_plates.py 202502_Valentine_gifts/phonestand_original.stl \
+        Alben Armstead Baldwin --size 8 --depth 1.2
+
+Glyph outlines are triangulated and extruded once per (font, character,
+size, depth) in the parent process; the pool workers only translate cached
+glyph meshes and run the boolean for their name.
+"""
+import argparse
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import reduce
+
+import numpy as np
+import trimesh
+from matplotlib.font_manager import FontProperties
+from matplotlib.textpath import TextPath, TextToPath
+from shapely.geometry import MultiPolygon, Polygon
+
+from part_export import export_part
+
+# Depth the lettering sinks into the base so the union fuses cleanly (mm)
+OVERLAP = 0.2
+
+_GLYPH_CACHE = {}
+_worker = {}
+
+
+def _font_properties(font, size):
+    if font and os.path.isfile(font):
+        return FontProperties(fname=font, size=size)
+    return FontProperties(family=font or 'DejaVu Sans', size=size)
+
+
+def _outline(char, prop):
+    """
+    Return the filled outline of a glyph as a shapely geometry.
+    """
+    path = TextPath((0, 0), char, prop=prop)
+    rings = [Polygon(ring) for ring in path.to_polygons() if len(ring) >= 4]
+    rings = [ring.buffer(0) for ring in rings if ring.area > 0]
+    if not rings:
+        return None
+    # Nested rings alternate between outline and hole (even-odd fill)
+    return reduce(lambda a, b: a.symmetric_difference(b), rings)
+
+
+def glyph(char, font=None, size=10.0, depth=1.0):
+    """
+    Extruded mesh and advance width (mm) of one character, cached by
+    (font, char, size, depth). The mesh is None for blank characters.
+    """
+    key = (font, char, size, depth)
+    if key not in _GLYPH_CACHE:
+        prop = _font_properties(font, size)
+        advance = TextToPath().get_text_width_height_descent(char, prop, ismath=False)[0]
+        shape = None if char.isspace() else _outline(char, prop)
+        mesh = None
+        if shape is not None and not shape.is_empty:
+            polygons = shape.geoms if isinstance(shape, MultiPolygon) else [shape]
+            mesh = trimesh.util.concatenate([
+                trimesh.creation.extrude_polygon(polygon, depth + OVERLAP)
+                for polygon in polygons if polygon.area > 0
+            ])
+        _GLYPH_CACHE[key] = (mesh, advance)
+    return _GLYPH_CACHE[key]
+
+
+def layout_text(text, glyphs):
+    """
+    Place cached glyphs along a baseline, centred on the origin in XY.
+    """
+    pen = 0.0
+    parts = []
+    for char in text:
+        mesh, advance = glyphs[char]
+        if mesh is not None:
+            placed = mesh.copy()
+            placed.apply_translation([pen, 0, 0])
+            parts.append(placed)
+        pen += advance
+    if not parts:
+        return None
+    text_mesh = trimesh.util.concatenate(parts)
+    center = text_mesh.bounds.mean(axis=0)
+    text_mesh.apply_translation([-center[0], -center[1], 0])
+    return text_mesh
+
+
+def output_name(base_path, name):
+    stem = os.path.splitext(os.path.basename(base_path))[0]
+    # \w keeps letters of any script, so 'Zoë' and 'Zoe' stay distinct
+    slug = re.sub(r'[^\w-]+', '_', name).strip('_')
+    return f"{stem}_{slug}.stl"
+
+
+def _init_worker(base, glyphs, anchor, output_dir, base_path):
+    _worker.update(
+        base=base, glyphs=glyphs, anchor=anchor, output_dir=output_dir, base_path=base_path
+    )
+
+
+def _build(name):
+    text_mesh = layout_text(name, _worker['glyphs'])
+    if text_mesh is None:
+        result = _worker['base']
+    else:
+        text_mesh.apply_translation(np.asarray(_worker['anchor']) - [0, 0, OVERLAP])
+        result = trimesh.boolean.union([_worker['base'], text_mesh])
+    path = os.path.join(_worker['output_dir'], output_name(_worker['base_path'], name))
+    export_part(result, path)
+    return path
+
+
+def generate_name_plates(base_path, names, font=None, size=10.0, depth=1.0,
+                         at=None, output_dir=None, workers=None):
+    """
+    Emboss each name onto the base model and export one STL per name.
+    `at` is the (x, y[, z]) point the text is centred on; by default the
+    centre of the top face of the base's bounding box. Returns the paths.
+    """
+    base = trimesh.load(base_path, force='mesh')
+    (x0, y0, _), (x1, y1, z1) = base.bounds
+    anchor = [(x0 + x1) / 2, (y0 + y1) / 2, z1]
+    if at:
+        anchor[:len(at)] = at
+    output_dir = output_dir or os.path.dirname(os.path.abspath(base_path))
+    names = list(dict.fromkeys(names))
+    seen = {}
+    for name in names:
+        key = output_name(base_path, name).casefold()
+        if key in seen and seen[key] != name:
+            raise ValueError(f"{seen[key]!r} and {name!r} would both be written to "
+                             f"{output_name(base_path, name)}")
+        seen[key] = name
+    os.makedirs(output_dir, exist_ok=True)
+
+    chars = sorted(set(''.join(names)))
+    glyphs = {char: glyph(char, font, size, depth) for char in chars}
+    print(f"Cached {len(glyphs)} glyphs for {len(names)} names")
+
+    paths = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(base, glyphs, anchor, output_dir, base_path),
+    ) as pool:
+        futures = {pool.submit(_build, name): name for name in names}
+        for future in as_completed(futures):
+            try:
+                path = future.result()
+            except Exception as e:
+                print(f"Error generating plate for {futures[future]}: {e}")
+                continue
+            print(f"Exported {path}")
+            paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('base', help='STL to emboss the names onto')
+    parser.add_argument('names', nargs='*', help='names or messages, one model each')
+    parser.add_argument('--names-file', help='text file with one name per line')
+    parser.add_argument('--font', help='font family or path to a .ttf/.otf file')
+    parser.add_argument('--size', type=float, default=10.0, help='text size in mm')
+    parser.add_argument('--depth', type=float, default=1.0, help='text height above the surface in mm')
+    parser.add_argument('--at', type=float, nargs='+', metavar='XYZ',
+                        help='x y [z] point to centre the text on')
+    parser.add_argument('--output-dir', help='directory for the generated STLs')
+    parser.add_argument('--workers', type=int, help='number of worker processes')
+    args = parser.parse_args()
+
+    names = list(args.names)
+    if args.names_file:
+        with open(args.names_file) as f:
+            names += [line.strip() for line in f if line.strip()]
+    if not names:
+        parser.error('no names given')
+    try:
+        generate_name_plates(
+            args.base, names, font=args.font, size=args.size, depth=args.depth,
+            at=args.at, output_dir=args.output_dir, workers=args.workers,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+
+if __name__ == '__main__':
+    main()
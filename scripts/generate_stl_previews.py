@@ -1,98 +1,527 @@
 #!/usr/bin/env python3
 """
-Generate missing PNG previews for STL files in the repository.
+Generate missing PNG previews for STL (and compact .stlz) files in the repository.
+
+With --watch, stay running with trimesh imported, rerun a project's
+generator script in-process when it is saved, and re-render only the STLs
+that changed. File events come from inotify when `inotify_simple` is
+installed, otherwise from polling mtimes.
+
+With --views and/or --turntable, each mesh is also rendered from several
+camera angles into a '<name>_views.png' sprite sheet and a
+'<name>_turntable.gif'. The mesh is loaded and uploaded to one viewer
+window once; only the camera moves between frames.
+
+Models stored with Git LFS may be pointer files in a partial checkout.
+Every preview PNG records the OID (SHA-256) of the model it was rendered
+from, so its freshness is known from the pointer alone. Renders are also
+kept in a local cache keyed by OID and reused without fetching anything.
+Only the objects that really need a new render are fetched, all together
+in one `git lfs pull --include=...` (--no-fetch skips them instead).
 """
+import argparse
+import io
+import math
 import os
+import runpy
+import shutil
+import sys
+import time
+import traceback
+
 import trimesh
 
-def generate_previews(root_dir='.'):
+import lfs
+from stl_archive import SUFFIX as STLZ_SUFFIX, load_mesh
+
+MESH_SUFFIXES = ('.stl', STLZ_SUFFIX)
+
+# Directories never scanned for models or generator scripts
+SKIP_DIRS = {'.git', '__pycache__', 'scripts'}
+
+# Camera Euler angles (x, y, z) for named views; the camera looks at the
+# mesh centre from the rotated +Z axis, so 'front' looks along +Y
+VIEWS = {
+    'top': (0.0, 0.0, 0.0),
+    'front': (math.pi / 2, 0.0, 0.0),
+    'right': (math.pi / 2, 0.0, math.pi / 2),
+    'back': (math.pi / 2, 0.0, math.pi),
+    'iso': (math.radians(54.74), 0.0, math.pi / 4),
+    # front view of the half with y >= centre, showing the cut face
+    'section': (math.pi / 2, 0.0, 0.0),
+}
+DEFAULT_VIEWS = ('iso', 'front', 'top', 'section')
+# Sprite sheet of the named views, next to the model
+VIEWS_SUFFIX = '_views.png'
+
+# Camera elevation for turntable frames
+TURNTABLE_ELEVATION = math.radians(60)
+
+# PNG text chunk naming the OID of the model a preview was rendered from
+SOURCE_KEY = 'Source-OID'
+
+# Local, untracked cache of rendered previews: <oid>.png
+PREVIEW_CACHE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.preview_cache'
+)
+
+
+def preview_path(stl_path):
+    return os.path.splitext(stl_path)[0] + '.png'
+
+
+def png_source(png_path):
+    """
+    OID recorded in a preview PNG, or None for untagged images.
+    """
+    from PIL import Image
+    try:
+        with Image.open(png_path) as image:
+            return image.text.get(SOURCE_KEY)
+    except (OSError, AttributeError):
+        return None
+
+
+def preview_is_stale(stl_path, png_path, oid=None):
+    """
+    True if the PNG is missing or out of date. A PNG tagged with the OID of
+    its model is current exactly when the OID still matches, which works for
+    LFS pointers too. Untagged images fall back to comparing mtimes, but only
+    against real content: checkout order decides the mtimes of a fresh clone,
+    so an untagged PNG next to a pointer is taken as current rather than
+    fetching the model. Pass `oid` when it is already known to avoid hashing
+    the model again.
+    """
+    if not os.path.exists(png_path):
+        return True
+    source = png_source(png_path)
+    if source:
+        return source != (oid or lfs.content_id(stl_path))
+    if lfs.read_pointer(stl_path):
+        return False
+    try:
+        return os.path.getmtime(png_path) < os.path.getmtime(stl_path)
+    except OSError:
+        return True
+
+
+def save_png(image, png_path, oid):
+    """
+    Save a PIL image tagged with the OID of the model it shows.
+    """
+    from PIL.PngImagePlugin import PngInfo
+    info = PngInfo()
+    info.add_text(SOURCE_KEY, oid)
+    image.save(png_path, pnginfo=info)
+
+
+def _load(stl_path):
+    """
+    Parse a model for rendering, or print why it cannot be and return None.
+    """
+    try:
+        return load_mesh(stl_path)
+    except Exception as e:
+        print(f"Error loading {stl_path}: {e}")
+        return None
+
+
+def render_preview(stl_path, png_path, oid=None, mesh=None):
+    """
+    Render one STL to a PNG, tagged with the model's OID (hashed here unless
+    given) and copied to the preview cache. Pass the parsed `mesh` when the
+    caller renders views of it too. Returns True if the image was written.
+    """
+    try:
+        mesh = mesh if mesh is not None else load_mesh(stl_path)
+        from trimesh import Scene
+        if isinstance(mesh, Scene):
+            scene = mesh
+        elif hasattr(mesh, 'scene'):
+            scene = mesh.scene()
+        else:
+            scene = Scene(mesh)
+        png = scene.save_image(resolution=[800, 600])
+        if png:
+            from PIL import Image
+            oid = oid or lfs.content_id(stl_path)
+            save_png(Image.open(io.BytesIO(png)), png_path, oid)
+            os.makedirs(PREVIEW_CACHE, exist_ok=True)
+            shutil.copyfile(png_path, os.path.join(PREVIEW_CACHE, oid + '.png'))
+            print(f"Generated preview: {png_path}")
+            return True
+        print(f"Warning: could not render preview for {stl_path}")
+    except Exception as e:
+        print(f"Error generating preview for {stl_path}: {e}")
+    return False
+
+
+def _sprite_sheet(images, columns):
+    from PIL import Image
+    width, height = images[0].size
+    rows = math.ceil(len(images) / columns)
+    sheet = Image.new('RGBA', (width * columns, height * rows), (255, 255, 255, 0))
+    for i, image in enumerate(images):
+        sheet.paste(image, ((i % columns) * width, (i // columns) * height))
+    return sheet
+
+
+def render_views(stl_path, views=DEFAULT_VIEWS, turntable=0, resolution=(400, 300),
+                 oid=None, mesh=None):
+    """
+    Render several views of one mesh from a single load and GL upload.
+
+    Named `views` (see VIEWS) are tiled into '<name>_views.png'; `turntable`
+    frames around the Z axis are written to '<name>_turntable.gif'. One
+    viewer window is opened per mesh and only its camera moves between
+    frames; for 'section' the mesh cut through its centre, uploaded along
+    with it, is shown in place of the whole mesh. The sheet is tagged like
+    a preview, with `oid` if already known; `mesh` is parsed here unless
+    given. Returns the list of written paths.
+    """
+    from PIL import Image
+    stem = os.path.splitext(stl_path)[0]
+    written = []
+    viewer = None
+    try:
+        import pyglet
+        from trimesh.viewer.windowed import SceneViewer
+
+        mesh = mesh if mesh is not None else load_mesh(stl_path)
+        scene = mesh if isinstance(mesh, trimesh.Scene) else trimesh.Scene(mesh)
+        center = scene.centroid
+        whole = list(scene.graph.nodes_geometry)
+        section = None
+        if 'section' in views and isinstance(mesh, trimesh.Trimesh):
+            section = scene.add_geometry(trimesh.intersections.slice_mesh_plane(
+                mesh, plane_normal=[0, 1, 0], plane_origin=mesh.centroid, cap=True
+            ))
+        viewer = SceneViewer(scene, start_loop=False, resolution=list(resolution))
+
+        def frame(angles, cut=False):
+            for node in whole:
+                (viewer.hide_geometry if cut else viewer.unhide_geometry)(node)
+            if section is not None:
+                (viewer.unhide_geometry if cut else viewer.hide_geometry)(section)
+            scene.set_camera(angles=angles, center=center)
+            # Draw and flip twice so both buffers hold this view
+            for _ in range(2):
+                pyglet.clock.tick()
+                viewer.switch_to()
+                viewer.dispatch_events()
+                viewer.dispatch_event('on_draw')
+                viewer.flip()
+            png = io.BytesIO()
+            viewer.save_image(png)
+            png.seek(0)
+            return Image.open(png).convert('RGBA')
+
+        images = [frame(VIEWS[view], cut=view == 'section' and section is not None)
+                  for view in views]
+        if images:
+            sheet_path = stem + VIEWS_SUFFIX
+            save_png(_sprite_sheet(images, min(len(images), 2)), sheet_path,
+                     oid or lfs.content_id(stl_path))
+            written.append(sheet_path)
+            print(f"Generated views: {sheet_path}")
+
+        if turntable:
+            frames = [
+                frame((TURNTABLE_ELEVATION, 0.0, 2 * math.pi * i / turntable))
+                for i in range(turntable)
+            ]
+            gif_path = stem + '_turntable.gif'
+            frames[0].save(gif_path, save_all=True, append_images=frames[1:],
+                           duration=100, loop=0, disposal=2)
+            written.append(gif_path)
+            print(f"Generated turntable: {gif_path}")
+    except Exception as e:
+        print(f"Error generating views for {stl_path}: {e}")
+    finally:
+        if viewer is not None:
+            viewer.close()
+    return written
+
+
+def update_readme(dirpath, png_files):
+    """
+    Rewrite the '## Previews' section of a folder's README.md.
+    """
+    readme_path = os.path.join(dirpath, 'README.md')
+    if os.path.exists(readme_path):
+        with open(readme_path, 'r') as f:
+            lines = f.read().splitlines()
+    else:
+        # start new README with title
+        title = os.path.basename(dirpath)
+        lines = [f"# {title}", ""]
+    # remove existing Previews section
+    new_lines = []
+    in_previews = False
+    for line in lines:
+        if line.strip().startswith('## Previews'):
+            in_previews = True
+            continue
+        if in_previews:
+            if line.startswith('## '):
+                in_previews = False
+                new_lines.append(line)
+            # else skip preview lines
+            continue
+        new_lines.append(line)
+    # ensure blank line before new section
+    if new_lines and new_lines[-1].strip() != '':
+        new_lines.append('')
+    # append previews
+    new_lines.append('## Previews')
+    new_lines.append('')
+    for png in png_files:
+        new_lines.append(f"![{png}]({png})")
+    new_lines.append('')
+    # write back
+    with open(readme_path, 'w') as f:
+        f.write("\n".join(new_lines))
+
+
+def readme_pngs(filenames):
+    """
+    The single-view previews among `filenames`, sorted; multi-view sprite
+    sheets are left out of the README.
+    """
+    return sorted(f for f in filenames
+                  if f.lower().endswith('.png') and not f.lower().endswith(VIEWS_SUFFIX))
+
+
+def update_folder_readme(dirpath):
+    pngs = readme_pngs(os.listdir(dirpath))
+    if pngs:
+        update_readme(dirpath, pngs)
+
+
+def resolve_pointers(todo, fetch=True):
+    """
+    Make the models in `todo` ((path, needs_preview, needs_views) tuples)
+    renderable. For LFS pointers a cached preview of the same OID is copied
+    into place; the objects still needed are fetched by path, or skipped
+    when `fetch` is False. Returns the tuples that can be rendered now.
+    """
+    ready, missing = [], []
+    for stl_path, needs_preview, needs_views in todo:
+        pointer = lfs.read_pointer(stl_path)
+        if pointer is None:
+            ready.append((stl_path, needs_preview, needs_views))
+            continue
+        cached = os.path.join(PREVIEW_CACHE, pointer.oid + '.png')
+        if needs_preview and os.path.exists(cached):
+            shutil.copyfile(cached, preview_path(stl_path))
+            print(f"Reused cached preview: {preview_path(stl_path)}")
+            needs_preview = False
+        if needs_preview or needs_views:
+            missing.append((stl_path, needs_preview, needs_views, pointer))
+    if not missing:
+        return ready
+
+    if fetch:
+        size = sum(m[3].size for m in missing)
+        print(f"Fetching {len(missing)} LFS object(s) ({size / 1e6:.1f} MB) to render...")
+        fetched = set(lfs.fetch([m[0] for m in missing]))
+    else:
+        fetched = set()
+    for stl_path, needs_preview, needs_views, _ in missing:
+        if os.path.abspath(stl_path) in fetched:
+            ready.append((stl_path, needs_preview, needs_views))
+        else:
+            print(f"Skipping {stl_path}: LFS pointer, object not fetched")
+    return ready
+
+
+def generate_previews(root_dir='.', views=(), turntable=0, fetch=True):
     """
     Generate PNG previews for STL files, then update README.md in each folder containing PNGs.
+    `views` and `turntable` additionally request multi-view renders (see `render_views`).
+    LFS pointers are only fetched when their preview is out of date (see `resolve_pointers`).
     """
-    # First, generate or update PNG previews
+    # First, find the models whose previews are missing or out of date,
+    # hashing each one once
+    todo, oids = [], {}
     for root, _, files in os.walk(root_dir):
         for filename in files:
-            if not filename.lower().endswith('.stl'):
+            if not filename.lower().endswith(MESH_SUFFIXES):
                 continue
             stl_path = os.path.join(root, filename)
-            png_name = os.path.splitext(filename)[0] + '.png'
-            png_path = os.path.join(root, png_name)
-            # Determine if regeneration is needed
-            regenerate = True
-            if os.path.exists(png_path):
-                try:
-                    stl_mtime = os.path.getmtime(stl_path)
-                    png_mtime = os.path.getmtime(png_path)
-                    if png_mtime >= stl_mtime:
-                        regenerate = False
-                except OSError:
-                    regenerate = True
-            if not regenerate:
-                continue
-            try:
-                mesh = trimesh.load(stl_path)
-                from trimesh import Scene
-                if isinstance(mesh, Scene):
-                    scene = mesh
-                elif hasattr(mesh, 'scene'):
-                    scene = mesh.scene()
-                else:
-                    scene = Scene(mesh)
-                png = scene.save_image(resolution=[800, 600])
-                if png:
-                    with open(png_path, 'wb') as f:
-                        f.write(png)
-                    print(f"Generated preview: {png_path}")
-                else:
-                    print(f"Warning: could not render preview for {stl_path}")
-            except Exception as e:
-                print(f"Error generating preview for {stl_path}: {e}")
+            oid = oids[stl_path] = lfs.content_id(stl_path)
+            needs_preview = preview_is_stale(stl_path, preview_path(stl_path), oid)
+            needs_views = False
+            if views or turntable:
+                stem = os.path.splitext(stl_path)[0]
+                targets = ([stem + VIEWS_SUFFIX] if views else []) + \
+                    ([stem + '_turntable.gif'] if turntable else [])
+                needs_views = any(preview_is_stale(stl_path, t, oid) for t in targets)
+            if needs_preview or needs_views:
+                todo.append((stl_path, needs_preview, needs_views))
+
+    # Then render them, parsing each model once and fetching only the LFS
+    # objects that are needed
+    for stl_path, needs_preview, needs_views in resolve_pointers(todo, fetch):
+        mesh = _load(stl_path)
+        if mesh is None:
+            continue
+        if needs_preview:
+            render_preview(stl_path, preview_path(stl_path), oids[stl_path], mesh)
+        if needs_views:
+            render_views(stl_path, views, turntable, oid=oids[stl_path], mesh=mesh)
 
     # Then, update README.md in any subdirectory containing PNGs
     base_dir = os.path.abspath(root_dir)
-    def update_readme(dirpath, png_files):
-        readme_path = os.path.join(dirpath, 'README.md')
-        if os.path.exists(readme_path):
-            with open(readme_path, 'r') as f:
-                lines = f.read().splitlines()
-        else:
-            # start new README with title
-            title = os.path.basename(dirpath)
-            lines = [f"# {title}", ""]
-        # remove existing Previews section
-        new_lines = []
-        in_previews = False
-        for line in lines:
-            if line.strip().startswith('## Previews'):
-                in_previews = True
-                continue
-            if in_previews:
-                if line.startswith('## '):
-                    in_previews = False
-                    new_lines.append(line)
-                # else skip preview lines
-                continue
-            new_lines.append(line)
-        # ensure blank line before new section
-        if new_lines and new_lines[-1].strip() != '':
-            new_lines.append('')
-        # append previews
-        new_lines.append('## Previews')
-        new_lines.append('')
-        for png in png_files:
-            new_lines.append(f"![{png}]({png})")
-        new_lines.append('')
-        # write back
-        with open(readme_path, 'w') as f:
-            f.write("\n".join(new_lines))
-
     for root, _, files in os.walk(root_dir):
         # skip top-level folder
         if os.path.abspath(root) == base_dir:
             continue
-        pngs = [f for f in files if f.lower().endswith('.png')]
+        pngs = readme_pngs(files)
         if pngs:
-            update_readme(root, sorted(pngs))
+            update_readme(root, pngs)
+
+
+def _project_dirs(root_dir):
+    base_dir = os.path.abspath(root_dir)
+    for root, dirs, _ in os.walk(base_dir):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith('.')]
+        if root != base_dir:
+            yield root
+
+
+def _is_generator(path, root_dir):
+    return (path.endswith('.py')
+            and os.path.dirname(os.path.abspath(path)) != os.path.abspath(root_dir))
+
+
+def _snapshot(root_dir):
+    """
+    Map every watched file to its mtime (used when inotify is unavailable).
+    """
+    state = {}
+    for dirpath in _project_dirs(root_dir):
+        for filename in os.listdir(dirpath):
+            if filename.lower().endswith(MESH_SUFFIXES + ('.py',)):
+                path = os.path.join(dirpath, filename)
+                try:
+                    state[path] = os.path.getmtime(path)
+                except OSError:
+                    pass
+    return state
+
+
+def _poll_changes(root_dir, interval):
+    state = _snapshot(root_dir)
+    while True:
+        time.sleep(interval)
+        current = _snapshot(root_dir)
+        changed = {p for p, m in current.items() if state.get(p) != m}
+        state = current
+        if changed:
+            yield changed
+
+
+def _inotify_changes(root_dir, interval):
+    """
+    Set up inotify watches and return an iterator of changed-path batches.
+    Raises ImportError if inotify_simple is not installed.
+    """
+    from inotify_simple import INotify, flags
+    inotify = INotify()
+    mask = flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE
+    watches = {}
+    for dirpath in _project_dirs(root_dir):
+        watches[inotify.add_watch(dirpath, mask)] = dirpath
+
+    def batches():
+        while True:
+            # Block for the first event, then collect the rest of the burst
+            events = inotify.read()
+            events += inotify.read(timeout=int(interval * 1000))
+            changed = set()
+            for event in events:
+                path = os.path.join(watches[event.wd], event.name)
+                if flags.ISDIR in flags.from_mask(event.mask):
+                    if event.name not in SKIP_DIRS and not event.name.startswith('.'):
+                        watches[inotify.add_watch(path, mask)] = path
+                elif event.name.lower().endswith(MESH_SUFFIXES + ('.py',)):
+                    changed.add(path)
+            if changed:
+                yield changed
+
+    return batches()
+
+
+def run_generator(script_path):
+    """
+    Execute a generator script in-process, reusing the already imported modules.
+    """
+    print(f"Running {script_path}...")
+    start = time.time()
+    argv = sys.argv
+    sys.argv = [script_path]
+    try:
+        runpy.run_path(script_path, run_name='__main__')
+    except (Exception, SystemExit):
+        traceback.print_exc()
+    finally:
+        sys.argv = argv
+    print(f"Finished {script_path} in {time.time() - start:.2f}s")
+
+
+def watch(root_dir='.', interval=0.5, views=(), turntable=0, fetch=True):
+    """
+    Keep trimesh imported and react to saved files: rerun a changed
+    generator script, re-render a changed STL and refresh its README.
+    """
+    try:
+        changes = _inotify_changes(root_dir, interval)
+        backend = 'inotify'
+    except (ImportError, OSError):
+        changes = _poll_changes(root_dir, interval)
+        backend = 'polling'
+    print(f"Watching {os.path.abspath(root_dir)} ({backend}); press Ctrl+C to stop.")
+    for changed in changes:
+        for path in sorted(p for p in changed if _is_generator(p, root_dir)):
+            run_generator(path)
+        meshes = sorted(p for p in changed
+                        if p.lower().endswith(MESH_SUFFIXES) and os.path.exists(p))
+        todo = resolve_pointers([(p, True, False) for p in meshes], fetch)
+        for path, _, _ in todo:
+            start = time.time()
+            mesh = _load(path)
+            if mesh is not None and render_preview(path, preview_path(path), mesh=mesh):
+                if views or turntable:
+                    render_views(path, views, turntable, mesh=mesh)
+                update_folder_readme(os.path.dirname(path))
+                print(f"  updated in {time.time() - start:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('root', nargs='?', default='.', help='repository root')
+    parser.add_argument('--watch', action='store_true',
+                        help='stay running and regenerate on file changes')
+    parser.add_argument('--views', nargs='?', const=','.join(DEFAULT_VIEWS), default='',
+                        help='comma-separated views for a sprite sheet '
+                             f'(choices: {", ".join(VIEWS)}; default: %(const)s)')
+    parser.add_argument('--turntable', type=int, default=0, metavar='FRAMES',
+                        help='also render a turntable GIF with this many frames')
+    parser.add_argument('--no-fetch', dest='fetch', action='store_false',
+                        help='skip Git LFS pointers instead of fetching their objects')
+    args = parser.parse_args()
+    views = [v for v in args.views.split(',') if v]
+    unknown = set(views) - set(VIEWS)
+    if unknown:
+        parser.error(f"unknown views: {', '.join(sorted(unknown))}")
+    generate_previews(args.root, views, args.turntable, fetch=args.fetch)
+    if args.watch:
+        try:
+            watch(args.root, views=views, turntable=args.turntable, fetch=args.fetch)
+        except KeyboardInterrupt:
+            pass
+
 
 if __name__ == '__main__':
-    generate_previews()
\ No newline at end of file
+    main()
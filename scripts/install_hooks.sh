@@ -6,5 +6,8 @@ HOOKS_DIR=.githooks
 git config core.hooksPath ${HOOKS_DIR}
 # Ensure our hook and helper script are executable
 chmod +x ${HOOKS_DIR}/pre-commit
-chmod +x scripts/generate_stl_previews.py
-echo "Git hooks installed. Pre-commit will generate PNG previews for new STL files."
\ No newline at end of file
+chmod +x scripts/generate_stl_previews.py scripts/mesh_diff.py
+# Geometric diff for meshes: git difftool -t meshdiff -- '*.stl'
+git config difftool.meshdiff.cmd 'python3 scripts/mesh_diff.py "$LOCAL" "$REMOTE" --name "$MERGED"'
+echo "Git hooks installed. Pre-commit will generate PNG previews for new STL files."
+echo "Compare STL versions with: git difftool -t meshdiff -- '*.stl'"
\ No newline at end of file
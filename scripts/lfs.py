@@ -0,0 +1,101 @@
+"""
+Git LFS pointer files: recognise them and fetch single objects on demand.
+
+In a partial or pointer-only checkout (e.g. GIT_LFS_SKIP_SMUDGE=1) a large
+model is a small text file in place of the real content:
+
+    version https://git-lfs.github.com/spec/v1
+    oid sha256:4d7a2146...
+    size 3497484
+
+The OID is the SHA-256 of the real content, so `content_id` gives the same
+value for a pointer and for the file it stands for, and caches keyed by it
+work in either kind of checkout without fetching anything.
+"""
+import hashlib
+import os
+import subprocess
+from collections import namedtuple
+
+Pointer = namedtuple('Pointer', ['oid', 'size'])
+
+POINTER_PREFIX = b'version https://git-lfs.github.com/spec/'
+# Pointer files are always smaller than this (LFS specification)
+MAX_POINTER_SIZE = 1024
+
+
+def parse_pointer(data):
+    """
+    Return a Pointer for the bytes of an LFS pointer file, otherwise None.
+    """
+    if len(data) >= MAX_POINTER_SIZE or not data.startswith(POINTER_PREFIX):
+        return None
+    fields = {}
+    for line in data.decode('utf-8', 'replace').splitlines():
+        key, _, value = line.partition(' ')
+        fields[key] = value.strip()
+    oid, size = fields.get('oid', ''), fields.get('size', '')
+    if not oid.startswith('sha256:') or len(oid) != 71 or not size.isdigit():
+        return None
+    return Pointer(oid[len('sha256:'):], int(size))
+
+
+def read_pointer(path):
+    """
+    Return a Pointer if the file at `path` is an LFS pointer, otherwise None.
+    """
+    try:
+        if os.path.getsize(path) >= MAX_POINTER_SIZE:
+            return None
+        with open(path, 'rb') as f:
+            return parse_pointer(f.read())
+    except OSError:
+        return None
+
+
+def content_id(path):
+    """
+    SHA-256 hex digest of a file's real content: the OID for a pointer,
+    otherwise the hash of the file itself.
+    """
+    pointer = read_pointer(path)
+    if pointer:
+        return pointer.oid
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_size(path):
+    """
+    Size of a file's real content, taken from the pointer if it is one.
+    """
+    pointer = read_pointer(path)
+    return pointer.size if pointer else os.path.getsize(path)
+
+
+def fetch(paths):
+    """
+    Download and check out the LFS objects behind the given pointer files,
+    and nothing else. Returns the paths that now hold real content.
+    """
+    paths = [os.path.abspath(p) for p in paths]
+    if not paths:
+        return []
+    cwd = os.path.dirname(paths[0])
+    try:
+        top = subprocess.run(
+            ['git', 'rev-parse', '--show-toplevel'],
+            cwd=cwd, check=True, capture_output=True, text=True,
+        ).stdout.strip()
+        include = ','.join(os.path.relpath(p, top).replace(os.sep, '/') for p in paths)
+        subprocess.run(
+            ['git', 'lfs', 'pull', f'--include={include}', '--exclude='],
+            cwd=top, check=True, capture_output=True, text=True,
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        detail = getattr(e, 'stderr', None) or e
+        print(f"Warning: could not fetch LFS objects: {str(detail).strip()}")
+    return [p for p in paths if read_pointer(p) is None]
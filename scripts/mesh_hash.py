@@ -0,0 +1,53 @@
+"""
+Order- and placement-independent hashing of triangle mesh geometry.
+"""
+import hashlib
+
+import numpy as np
+
+# Quantization step (mm) used when comparing geometry; far below printer resolution
+DEFAULT_STEP = 1e-4
+
+
+def quantize_triangles(triangles, step=DEFAULT_STEP):
+    """
+    Quantize an (n, 3, 3) triangle array to integer grid coordinates.
+
+    Each triangle is rotated so its lexicographically smallest corner comes
+    first, which keeps the winding but removes the arbitrary choice of
+    starting vertex. Returns an (n, 9) int64 array.
+    """
+    q = np.round(np.asarray(triangles, dtype=np.float64) / step).astype(np.int64)
+    if len(q) == 0:
+        return q.reshape(0, 9)
+    first = np.lexsort((q[..., 2], q[..., 1], q[..., 0]), axis=-1)[:, 0]
+    roll = (first[:, None] + np.arange(3)) % 3
+    q = q[np.arange(len(q))[:, None], roll]
+    return q.reshape(-1, 9)
+
+
+def sort_rows(rows):
+    """
+    Return the permutation that sorts integer rows lexicographically.
+    """
+    return np.lexsort(rows.T[::-1])
+
+
+def canonical_triangles(triangles, step=DEFAULT_STEP):
+    """
+    Quantized triangles in a canonical order (see `quantize_triangles`).
+    """
+    q = quantize_triangles(triangles, step)
+    return q[sort_rows(q)]
+
+
+def geometry_key(mesh, step=DEFAULT_STEP):
+    """
+    Hash a mesh's shape independently of triangle order and translation.
+
+    Two meshes get the same key when one is a translated copy of the other,
+    e.g. the left and right latches of an assembly. Returns a hex digest.
+    """
+    triangles = mesh.triangles - mesh.bounds[0]
+    q = canonical_triangles(triangles, step)
+    return hashlib.sha256(np.ascontiguousarray(q).tobytes()).hexdigest()
@@ -0,0 +1,224 @@
+"""
+Vectorized clean-up of boolean results before export.
+
+`repair_mesh` merges vertices on a quantized grid, drops degenerate and
+duplicate faces, makes the winding consistent and outward-facing (inward
+for cavity shells), and fills small holes. Every step works on whole NumPy
+arrays; the only Python loops run over a fixed number of steps, over
+connected components or over chunks of them, never over single faces.
+"""
+import numpy as np
+import trimesh
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import breadth_first_order, connected_components
+
+# Vertices closer than this (mm) are merged
+MERGE_GRID = 1e-4
+# Faces smaller than this (mm^2) are dropped as degenerate
+MIN_AREA = 1e-8
+# Boundary loops with at most this many edges are filled
+MAX_HOLE_EDGES = 8
+
+
+def merge_vertices(vertices, faces, grid=MERGE_GRID):
+    """
+    Merge vertices that round to the same grid point.
+    """
+    keys = np.round(vertices / grid).astype(np.int64)
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    return vertices[first], inverse.reshape(-1)[faces]
+
+
+def drop_bad_faces(vertices, faces, min_area=MIN_AREA):
+    """
+    Remove faces with repeated vertices, near-zero area, or a duplicate
+    vertex set (the first occurrence is kept).
+    """
+    distinct = ((faces[:, 0] != faces[:, 1])
+                & (faces[:, 1] != faces[:, 2])
+                & (faces[:, 2] != faces[:, 0]))
+    tri = vertices[faces]
+    area = np.linalg.norm(np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0]), axis=1) / 2
+    faces = faces[distinct & (area > min_area)]
+    _, first = np.unique(np.sort(faces, axis=1), axis=0, return_index=True)
+    return faces[np.sort(first)]
+
+
+def _directed_edges(faces):
+    edges = faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+    return edges, np.repeat(np.arange(len(faces)), 3)
+
+
+def _edge_keys(edges):
+    """
+    One int64 per undirected edge, so edges can be grouped with 1D sorts.
+    """
+    low = edges.min(axis=1).astype(np.int64)
+    high = edges.max(axis=1).astype(np.int64)
+    return low * (int(edges.max(initial=0)) + 1) + high
+
+
+def fill_small_holes(faces, n_vertices, max_edges=MAX_HOLE_EDGES):
+    """
+    Close boundary loops of up to `max_edges` edges with fan triangles.
+
+    Boundary edges are the undirected edges used by exactly one face. They
+    are reversed into hole edges, and each hole vertex is followed along
+    its successor for `max_edges` steps to find the loops that close.
+    """
+    edges, _ = _directed_edges(faces)
+    _, inverse, counts = np.unique(_edge_keys(edges), return_inverse=True, return_counts=True)
+    boundary = edges[counts[inverse] == 1][:, ::-1]
+    if len(boundary) == 0:
+        return faces
+
+    # Only vertices with a single outgoing hole edge can be walked unambiguously
+    outgoing = np.bincount(boundary[:, 0], minlength=n_vertices)
+    boundary = boundary[outgoing[boundary[:, 0]] == 1]
+    successor = np.full(n_vertices, -1)
+    successor[boundary[:, 0]] = boundary[:, 1]
+
+    start = boundary[:, 0]
+    walk = [start]
+    for _ in range(max_edges - 1):
+        previous = walk[-1]
+        walk.append(np.where(previous >= 0, successor[np.maximum(previous, 0)], -1))
+    walk = np.stack(walk, axis=1)
+
+    closes = walk[:, 1:] == start[:, None]
+    length = np.where(closes.any(axis=1), closes.argmax(axis=1) + 1, 0)
+    # Each loop is found once from every vertex; keep the walk from its lowest vertex
+    in_loop = np.arange(max_edges)[None, :] < length[:, None]
+    lowest = np.where(in_loop, walk, np.iinfo(np.int64).max).min(axis=1)
+    keep = (length >= 3) & (lowest == start)
+    walk, length = walk[keep], length[keep]
+
+    new_faces = []
+    for i in range(1, max_edges - 1):
+        has = length > i + 1
+        new_faces.append(np.column_stack([walk[has, 0], walk[has, i], walk[has, i + 1]]))
+    return np.vstack([faces] + new_faces)
+
+
+def _winding_numbers(points, triangles, chunk=1 << 20):
+    """
+    Generalized winding number of each point with respect to the triangles
+    (sum of signed solid angles); about +-1 inside a closed shell, 0 outside.
+    Works through at most `chunk` point-triangle pairs at a time.
+    """
+    winding = np.zeros(len(points))
+    step = max(1, chunk // max(len(triangles), 1))
+    for i in range(0, len(points), step):
+        rel = triangles[None] - points[i:i + step, None, None]
+        a, b, c = rel[:, :, 0], rel[:, :, 1], rel[:, :, 2]
+        la, lb, lc = (np.linalg.norm(v, axis=2) for v in (a, b, c))
+        det = np.einsum('pij,pij->pi', a, np.cross(b, c))
+        denom = (la * lb * lc + np.einsum('pij,pij->pi', a, b) * lc
+                 + np.einsum('pij,pij->pi', a, c) * lb + np.einsum('pij,pij->pi', b, c) * la)
+        winding[i:i + step] = np.arctan2(det, denom).sum(axis=1) / (2 * np.pi)
+    return winding
+
+
+def _nesting_depth(vertices, faces, labels, n_components):
+    """
+    Number of other components enclosing each component. A component only
+    counts as enclosed when all of its vertices are inside the other one, so
+    shells that merely overlap (e.g. parts of a concatenated assembly) are
+    not mistaken for cavities. Bounding boxes and one face centre per
+    component rule out most pairs before the vertices are tested.
+    """
+    order = np.argsort(labels, kind='stable')
+    start = np.searchsorted(labels[order], np.arange(n_components + 1))
+    tri = vertices[faces]
+    probe = tri[order[start[:-1]]].mean(axis=1)
+    low = np.full((n_components, 3), np.inf)
+    high = np.full((n_components, 3), -np.inf)
+    np.minimum.at(low, labels, tri.min(axis=1))
+    np.maximum.at(high, labels, tri.max(axis=1))
+
+    depth = np.zeros(n_components, dtype=np.int64)
+    for c in range(n_components):
+        inside_box = np.all((low >= low[c]) & (high <= high[c]), axis=1)
+        inside_box[c] = False
+        tested = np.flatnonzero(inside_box)
+        if len(tested) == 0:
+            continue
+        shell = tri[order[start[c]:start[c + 1]]]
+        tested = tested[np.abs(_winding_numbers(probe[tested], shell)) > 0.5]
+        for d in tested:
+            corners = np.unique(faces[order[start[d]:start[d + 1]]])
+            depth[d] += np.all(np.abs(_winding_numbers(vertices[corners], shell)) > 0.5)
+    return depth
+
+
+def fix_winding(vertices, faces):
+    """
+    Make neighbouring faces agree on winding and point every closed
+    component outward, or inward for cavities enclosed by another one.
+
+    Faces sharing an edge in the same direction need opposite parity. The
+    parity of each face relative to its component root follows from a
+    breadth-first tree, resolved by pointer jumping in O(log n) array steps.
+    """
+    n = len(faces)
+    if n == 0:
+        return faces
+    edges, owner = _directed_edges(faces)
+    keys = _edge_keys(edges)
+    order = np.argsort(keys, kind='stable')
+    keys, edges, owner = keys[order], edges[order], owner[order]
+    # Only manifold edges (exactly two uses) define adjacency
+    _, group_start, group_size = np.unique(keys, return_index=True, return_counts=True)
+    i = group_start[group_size == 2]
+    a, b = owner[i], owner[i + 1]
+    flip = (edges[i, 0] == edges[i + 1, 0]).astype(np.int8)
+
+    graph = coo_matrix((np.ones(len(a)), (a, b)), shape=(n, n)).tocsr()
+    n_components, labels = connected_components(graph, directed=False)
+
+    parent = np.arange(n)
+    _, roots = np.unique(labels, return_index=True)
+    for root in roots:
+        _, predecessors = breadth_first_order(graph, root, directed=False)
+        members = predecessors >= 0
+        parent[members] = predecessors[members]
+
+    # Parity of each face relative to its parent in the tree
+    pair_keys = np.concatenate([a * n + b, b * n + a])
+    pair_flip = np.concatenate([flip, flip])
+    order = np.argsort(pair_keys)
+    pair_keys, pair_flip = pair_keys[order], pair_flip[order]
+    has_parent = parent != np.arange(n)
+    parity = np.zeros(n, dtype=np.int8)
+    lookup = np.searchsorted(pair_keys, np.flatnonzero(has_parent) * n + parent[has_parent])
+    parity[has_parent] = pair_flip[lookup]
+    while True:
+        parity = parity ^ parity[parent]
+        grand = parent[parent]
+        if np.array_equal(grand, parent):
+            break
+        parent = grand
+    faces = np.where(parity[:, None] == 1, faces[:, ::-1], faces)
+
+    # Orient each component so its signed volume is positive, or negative
+    # when it is a cavity (enclosed by an odd number of other components)
+    tri = vertices[faces]
+    volume = np.einsum('ij,ij->i', tri[:, 0], np.cross(tri[:, 1], tri[:, 2]))
+    volume = np.bincount(labels, weights=volume, minlength=n_components)
+    if n_components > 1:
+        cavity = _nesting_depth(vertices, faces, labels, n_components) % 2 == 1
+        volume = np.where(cavity, -volume, volume)
+    return np.where((volume < 0)[labels][:, None], faces[:, ::-1], faces)
+
+
+def repair_mesh(mesh, grid=MERGE_GRID, min_area=MIN_AREA, max_hole_edges=MAX_HOLE_EDGES):
+    """
+    Return a cleaned copy of `mesh` (see module docstring).
+    """
+    vertices, faces = merge_vertices(np.asarray(mesh.vertices), np.asarray(mesh.faces), grid)
+    faces = drop_bad_faces(vertices, faces, min_area)
+    # Hole edges are traced along the winding, so make it consistent first
+    faces = fix_winding(vertices, faces)
+    faces = fill_small_holes(faces, len(vertices), max_hole_edges)
+    used, faces = np.unique(faces, return_inverse=True)
+    return trimesh.Trimesh(vertices[used], faces.reshape(-1, 3), process=False)
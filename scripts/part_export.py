@@ -0,0 +1,78 @@
+"""
+Shared export step for the generator scripts.
+
+Parts are repaired (see `mesh_repair`) and written as canonical binary STL:
+vertices snapped to a fine grid, every triangle starting at its smallest
+corner, triangles sorted, normals recomputed and a fixed header. The same
+geometry therefore always produces the same bytes, and a file whose bytes
+would not change is left untouched, so its mtime (and preview) stays valid.
+"""
+import os
+import struct
+
+import numpy as np
+
+from mesh_hash import canonical_triangles
+from mesh_repair import MERGE_GRID, repair_mesh
+from stl_archive import RECORD
+
+STL_HEADER = b'binary STL, canonical triangle order'.ljust(80, b' ')
+
+# Relative change in volume (of a watertight part) that repair should never cause
+VOLUME_TOLERANCE = 1e-3
+
+
+def canonical_stl_bytes(mesh, step=MERGE_GRID):
+    """
+    Binary STL bytes that depend only on the geometry, not on face order.
+    """
+    grid = canonical_triangles(mesh.triangles, step)
+    triangles = (grid.reshape(-1, 3, 3) * step).astype('<f4')
+
+    edges = triangles[:, 1:].astype(np.float64) - triangles[:, :1]
+    normals = np.cross(edges[:, 0], edges[:, 1])
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    normals = np.divide(normals, length, out=np.zeros_like(normals), where=length > 0)
+
+    records = np.zeros(len(triangles), dtype=RECORD)
+    records['normal'] = normals
+    records['vertices'] = triangles
+    return STL_HEADER + struct.pack('<I', len(records)) + records.tobytes()
+
+
+def write_if_changed(path, data):
+    """
+    Write `data` to `path` unless the file already holds exactly these bytes.
+    Returns True if the file was written.
+    """
+    if os.path.exists(path) and os.path.getsize(path) == len(data):
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    with open(path, 'wb') as f:
+        f.write(data)
+    return True
+
+
+def export_part(mesh, path, repair=True, canonical=True):
+    """
+    Clean up a generated mesh and export it; STLs are written canonically
+    and only when their content changes. Returns the mesh that was written.
+
+    Repair only removes defects, so a watertight part keeps its volume; a
+    warning is printed if it does not (e.g. a shell turned inside out).
+    Already repaired parts concatenated into an assembly are best exported
+    with repair=False.
+    """
+    if repair:
+        before = mesh.volume if mesh.is_watertight else None
+        mesh = repair_mesh(mesh)
+        if before and abs(mesh.volume - before) > VOLUME_TOLERANCE * abs(before):
+            print(f"  Warning: repair changed the volume of {os.path.basename(path)} "
+                  f"from {before:.1f} to {mesh.volume:.1f} mm^3")
+    if canonical and path.lower().endswith('.stl'):
+        if not write_if_changed(path, canonical_stl_bytes(mesh)):
+            print(f"  {os.path.basename(path)} unchanged")
+    else:
+        mesh.export(path)
+    return mesh
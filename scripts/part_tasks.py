@@ -0,0 +1,48 @@
+"""
+Run the independent parts of a generator concurrently.
+
+A generator describes each exported part as a task: the output path, a
+module-level build function and its arguments. The tasks run in a process
+pool; each worker builds its part and exports it, so a part is written as
+soon as it is finished and the generator takes about as long as its slowest
+part. Build functions and their arguments must be picklable.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import tessellation
+from part_export import export_part
+
+
+def _run(path, build, args, export):
+    start = time.time()
+    mesh = build(*args)
+    tessellation.report(os.path.basename(path))
+    mesh = export(mesh, path)
+    return mesh, time.time() - start
+
+
+def run_parts(tasks, export=export_part, workers=None):
+    """
+    Build and export (path, build, args) tasks, in parallel when more than
+    one worker is available. `export(mesh, path)` must return the exported
+    mesh. Returns the exported meshes in task order.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    results = {}
+    if workers <= 1:
+        for path, build, args in tasks:
+            results[path] = _run(path, build, args, export)
+            print(f"  {os.path.basename(path)} done in {results[path][1]:.2f}s")
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_run, path, build, args, export): path
+                for path, build, args in tasks
+            }
+            for future in as_completed(futures):
+                path = futures[future]
+                results[path] = future.result()
+                print(f"  {os.path.basename(path)} done in {results[path][1]:.2f}s")
+    return [results[path][0] for path, _, _ in tasks]
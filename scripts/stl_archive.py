@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Compact archive format (.stlz) for STL files with byte-exact round-trip.
+
+Binary STLs store every triangle as a 50-byte record, repeating each shared
+vertex several times. An .stlz file keeps the 80-byte header, an indexed
+vertex table, an indexed normal table and the attribute bytes, with the
+vertex table and index buffers delta-encoded and the whole payload
+LZMA-compressed:
+
+- Vertices are quantized to a printer-resolution grid (`DEFAULT_STEP`) when
+  the grid reproduces every float32 coordinate exactly; otherwise the raw
+  float32 bit patterns are stored, so unpacking always yields the original
+  bytes. Pass `lossy=True` to keep the quantized grid regardless.
+- Files that are not well-formed binary STLs (e.g. ASCII STL) are stored as
+  plain LZMA-compressed bytes.
+"""
+import argparse
+import io
+import lzma
+import os
+import struct
+
+import numpy as np
+
+from lfs import parse_pointer
+
+MAGIC = b'STLZ'
+VERSION = 1
+SUFFIX = '.stlz'
+
+KIND_RAW = 0
+KIND_INDEXED = 1
+
+VERTEX_FLOAT32 = 0
+VERTEX_GRID = 1
+
+# Grid step (mm) for quantized vertices, well below any nozzle or layer size
+DEFAULT_STEP = 0.001
+
+RECORD = np.dtype([
+    ('normal', '<f4', (3,)),
+    ('vertices', '<f4', (3, 3)),
+    ('attr', '<u2'),
+])
+
+
+def _delta(values):
+    """Delta-encode a uint32 array along axis 0 (wrapping arithmetic)."""
+    values = values.astype(np.uint32)
+    out = values.copy()
+    out[1:] -= values[:-1]
+    return out
+
+
+def _undelta(values):
+    return np.cumsum(values.astype(np.uint32), axis=0, dtype=np.uint32)
+
+
+def _index(rows):
+    """
+    Return (unique_rows, inverse) for a 2D array, as np.unique would.
+    """
+    unique, inverse = np.unique(rows, axis=0, return_inverse=True)
+    return unique, inverse.reshape(-1).astype(np.uint32)
+
+
+def _parse_binary(data):
+    """
+    Return (header, records) for a binary STL, or None if `data` is not one.
+    """
+    if len(data) < 84:
+        return None
+    count = struct.unpack_from('<I', data, 80)[0]
+    if len(data) != 84 + count * RECORD.itemsize:
+        return None
+    return data[:80], np.frombuffer(data, dtype=RECORD, count=count, offset=84)
+
+
+def _grid_vertices(vertices, step, lossy):
+    """
+    Quantize float32 vertices to `step`; None if that would lose precision.
+    """
+    grid = np.round(vertices.astype(np.float64) / step)
+    if np.abs(grid).max(initial=0) >= 2 ** 31:
+        return None
+    grid = grid.astype(np.int32)
+    if not lossy and not np.array_equal(_from_grid(grid, step), vertices):
+        return None
+    return grid
+
+
+def _from_grid(grid, step):
+    return (grid.astype(np.float64) * step).astype('<f4')
+
+
+def pack(data, step=DEFAULT_STEP, lossy=False):
+    """
+    Encode the bytes of an STL file into .stlz bytes.
+    """
+    parsed = _parse_binary(data)
+    if parsed is None:
+        return MAGIC + struct.pack('<BB', VERSION, KIND_RAW) + lzma.compress(data)
+    header, records = parsed
+
+    vertices = records['vertices'].reshape(-1, 3)
+    grid = _grid_vertices(vertices, step, lossy)
+    if grid is None:
+        mode = VERTEX_FLOAT32
+        table, vertex_index = _index(vertices.view('<u4'))
+    else:
+        mode = VERTEX_GRID
+        table, vertex_index = _index(grid)
+        table = table.view('<u4')
+    normals, normal_index = _index(records['normal'].view('<u4'))
+
+    payload = io.BytesIO()
+    payload.write(header)
+    payload.write(struct.pack('<IBdII', len(records), mode, step, len(table), len(normals)))
+    for array in (
+        _delta(table),
+        _delta(vertex_index),
+        normals,
+        _delta(normal_index),
+        records['attr'],
+    ):
+        payload.write(np.ascontiguousarray(array).tobytes())
+    body = lzma.compress(payload.getvalue(), preset=9 | lzma.PRESET_EXTREME)
+    return MAGIC + struct.pack('<BB', VERSION, KIND_INDEXED) + body
+
+
+def unpack(blob):
+    """
+    Decode .stlz bytes back into the bytes of an STL file.
+    """
+    if blob[:4] != MAGIC:
+        raise ValueError('not an .stlz archive')
+    version, kind = struct.unpack_from('<BB', blob, 4)
+    if version != VERSION:
+        raise ValueError(f'unsupported .stlz version {version}')
+    body = lzma.decompress(blob[6:])
+    if kind == KIND_RAW:
+        return body
+
+    header = body[:80]
+    count, mode, step, n_vertices, n_normals = struct.unpack_from('<IBdII', body, 80)
+    offset = 80 + struct.calcsize('<IBdII')
+
+    def take(dtype, n):
+        nonlocal offset
+        array = np.frombuffer(body, dtype=dtype, count=n, offset=offset)
+        offset += array.nbytes
+        return array
+
+    table = _undelta(take('<u4', n_vertices * 3).reshape(-1, 3))
+    vertex_index = _undelta(take('<u4', count * 3))
+    normals = take('<u4', n_normals * 3).reshape(-1, 3)
+    normal_index = _undelta(take('<u4', count))
+    attr = take('<u2', count)
+
+    if mode == VERTEX_GRID:
+        table = _from_grid(table.view(np.int32), step)
+    else:
+        table = table.view('<f4')
+
+    records = np.empty(count, dtype=RECORD)
+    records['normal'] = normals.view('<f4')[normal_index]
+    records['vertices'] = table[vertex_index].reshape(-1, 3, 3)
+    records['attr'] = attr
+    return header + struct.pack('<I', count) + records.tobytes()
+
+
+def read_stl_bytes(path):
+    """
+    Return STL bytes for either an .stl or an .stlz file.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if parse_pointer(data):
+        raise ValueError(f'{path} is a Git LFS pointer; fetch it with '
+                         f'git lfs pull --include="{path}"')
+    if path.lower().endswith(SUFFIX):
+        return unpack(data)
+    return data
+
+
+def load_mesh(path, **kwargs):
+    """
+    Load an .stl or .stlz file with trimesh.
+    """
+    import trimesh
+    return trimesh.load(
+        file_obj=io.BytesIO(read_stl_bytes(path)), file_type='stl', **kwargs
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert between STL and .stlz archives.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    pack_cmd = sub.add_parser('pack', help='STL -> .stlz')
+    pack_cmd.add_argument('files', nargs='+')
+    pack_cmd.add_argument('--step', type=float, default=DEFAULT_STEP,
+                          help='vertex grid step in mm (default: %(default)s)')
+    pack_cmd.add_argument('--lossy', action='store_true',
+                          help='keep quantized vertices even if not byte-exact')
+    pack_cmd.add_argument('--remove', action='store_true',
+                          help='delete the STL after a verified conversion')
+    unpack_cmd = sub.add_parser('unpack', help='.stlz -> STL')
+    unpack_cmd.add_argument('files', nargs='+')
+    args = parser.parse_args()
+
+    for path in args.files:
+        stem = os.path.splitext(path)[0]
+        if args.command == 'pack':
+            with open(path, 'rb') as f:
+                data = f.read()
+            blob = pack(data, step=args.step, lossy=args.lossy)
+            exact = unpack(blob) == data
+            out = stem + SUFFIX
+            with open(out, 'wb') as f:
+                f.write(blob)
+            print(f"{path} -> {out}: {len(data)} -> {len(blob)} bytes"
+                  f" ({'exact' if exact else 'quantized'})")
+            if args.remove and exact:
+                os.remove(path)
+        else:
+            out = stem + '.stl'
+            with open(out, 'wb') as f:
+                f.write(read_stl_bytes(path))
+            print(f"{path} -> {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Round primitives tessellated to a chordal tolerance instead of fixed counts.
+
+`trimesh.creation` builds every cylinder with 32 sections and every
+icosphere with 3 subdivisions (1280 faces), whether it is a 0.6 mm nub or
+a large feature. Here the segment count is the smallest one whose chordal
+deviation (the gap between a flat facet and the true surface) stays within
+a tolerance derived from what the printer can resolve. The project-wide
+`MODEL_QUALITY` environment variable (draft, normal or fine) scales that
+tolerance. Faces saved against the trimesh defaults are counted and printed
+per stage with `report`.
+"""
+import math
+import os
+
+import numpy as np
+import trimesh
+
+# Printer resolution the tolerance is tied to (mm)
+NOZZLE_DIAMETER = 0.4
+LAYER_HEIGHT = 0.2
+RESOLUTION = min(NOZZLE_DIAMETER / 2, LAYER_HEIGHT)
+
+# Chordal tolerance as a fraction of the printer resolution
+QUALITY = {'draft': 0.5, 'normal': 0.25, 'fine': 0.1}
+DEFAULT_QUALITY = 'normal'
+
+# trimesh.creation defaults the savings are measured against
+DEFAULT_SECTIONS = 32
+DEFAULT_SUBDIVISIONS = 3
+MIN_SECTIONS = 8
+MAX_SUBDIVISIONS = 5
+
+# kind -> [primitives, faces built, faces with trimesh defaults]
+_stats = {}
+_sphere_error = {}
+
+
+def quality():
+    name = os.environ.get('MODEL_QUALITY', DEFAULT_QUALITY).lower()
+    if name not in QUALITY:
+        raise ValueError(f"MODEL_QUALITY must be one of {', '.join(QUALITY)}, not {name!r}")
+    return name
+
+
+def tolerance():
+    """
+    Chordal tolerance in mm for the current quality setting.
+    """
+    return RESOLUTION * QUALITY[quality()]
+
+
+def sections_for(radius, tol=None):
+    """
+    Smallest number of sections (a multiple of 4, so the polygon keeps the
+    circle's axis-aligned extents) whose chordal deviation r(1 - cos(pi/n))
+    is within the tolerance.
+    """
+    tol = tolerance() if tol is None else tol
+    if tol >= radius:
+        return MIN_SECTIONS
+    n = math.ceil(math.pi / math.acos(1 - tol / radius))
+    return max(MIN_SECTIONS, 4 * math.ceil(n / 4))
+
+
+def _unit_sphere_error(subdivisions):
+    # Deepest point of a facet below the unit sphere: 1 - smallest facet plane distance
+    if subdivisions not in _sphere_error:
+        ico = trimesh.creation.icosphere(subdivisions=subdivisions)
+        plane = np.einsum('ij,ij->i', ico.face_normals, ico.triangles[:, 0])
+        _sphere_error[subdivisions] = 1.0 - plane.min()
+    return _sphere_error[subdivisions]
+
+
+def subdivisions_for(radius, tol=None):
+    """
+    Fewest icosphere subdivisions whose chordal deviation is within the tolerance.
+    """
+    tol = tolerance() if tol is None else tol
+    for subdivisions in range(MAX_SUBDIVISIONS + 1):
+        if radius * _unit_sphere_error(subdivisions) <= tol:
+            return subdivisions
+    return MAX_SUBDIVISIONS
+
+
+def _count(kind, mesh, default_faces):
+    stats = _stats.setdefault(kind, [0, 0, 0])
+    stats[0] += 1
+    stats[1] += len(mesh.faces)
+    stats[2] += default_faces
+
+
+def cylinder(radius, height, tol=None, **kwargs):
+    """
+    `trimesh.creation.cylinder` with sections chosen from the tolerance.
+    """
+    mesh = trimesh.creation.cylinder(
+        radius=radius, height=height, sections=sections_for(radius, tol), **kwargs
+    )
+    _count('cylinder', mesh, 4 * DEFAULT_SECTIONS)
+    return mesh
+
+
+def icosphere(radius, tol=None, **kwargs):
+    """
+    `trimesh.creation.icosphere` with subdivisions chosen from the tolerance.
+    """
+    mesh = trimesh.creation.icosphere(
+        subdivisions=subdivisions_for(radius, tol), radius=radius, **kwargs
+    )
+    _count('icosphere', mesh, 20 * 4 ** DEFAULT_SUBDIVISIONS)
+    return mesh
+
+
+def report(stage):
+    """
+    Print the faces saved by the primitives built since the last report.
+    """
+    if not _stats:
+        return
+    built = sum(s[1] for s in _stats.values())
+    default = sum(s[2] for s in _stats.values())
+    kinds = ', '.join(f"{s[0]} {kind}{'s' if s[0] > 1 else ''}" for kind, s in sorted(_stats.items()))
+    print(f"  Tessellation {stage} ({quality()}, {tolerance():.3f} mm): {kinds}, "
+          f"{built} faces instead of {default} (-{default - built})")
+    _stats.clear()
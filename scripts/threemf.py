@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Write assemblies as 3MF packages with shared mesh resources.
+
+Each distinct part geometry is stored once as a mesh object, and every
+occurrence of it becomes a build item with a translation. Duplicates are
+found automatically by hashing the quantized geometry (see `mesh_hash`).
+Vertices and triangles are written in canonical order, so the same geometry
+always gives the same package bytes.
+"""
+import argparse
+import io
+import os
+import zipfile
+
+import numpy as np
+import trimesh
+
+from mesh_hash import DEFAULT_STEP, canonical_triangles, geometry_key
+from part_export import write_if_changed
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" '
+    'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="model" '
+    'ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>'
+    '</Types>'
+)
+
+RELS = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Target="/3D/3dmodel.model" Id="rel0" '
+    'Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>'
+    '</Relationships>'
+)
+
+
+def _escape(text):
+    return (text.replace('&', '&amp;').replace('<', '&lt;')
+            .replace('>', '&gt;').replace('"', '&quot;'))
+
+
+def _mesh_xml(mesh, step=DEFAULT_STEP):
+    """
+    Serialize a mesh as a 3MF <mesh> element, with vertices snapped to the
+    grid and sorted and triangles in canonical order (see `mesh_hash`).
+    """
+    grid = canonical_triangles(mesh.triangles, step).reshape(-1, 3)
+    corners, faces = np.unique(grid, axis=0, return_inverse=True)
+    vertices = ''.join(
+        f'<vertex x="{x}" y="{y}" z="{z}"/>'
+        for x, y, z in (corners * step).round(6).tolist()
+    )
+    triangles = ''.join(
+        f'<triangle v1="{a}" v2="{b}" v3="{c}"/>'
+        for a, b, c in faces.reshape(-1, 3).tolist()
+    )
+    return f'<mesh><vertices>{vertices}</vertices><triangles>{triangles}</triangles></mesh>'
+
+
+def group_instances(parts, step=DEFAULT_STEP):
+    """
+    Group (name, mesh) pairs by shape.
+
+    Returns a list of (name, local_mesh, offsets): `local_mesh` is the first
+    occurrence moved so its bounding box starts at the origin, and `offsets`
+    holds the translation of every occurrence in assembled pose.
+    """
+    groups = {}
+    for name, mesh in parts:
+        key = geometry_key(mesh, step)
+        offset = mesh.bounds[0].copy()
+        if key not in groups:
+            local = mesh.copy()
+            local.apply_translation(-offset)
+            groups[key] = (name, local, [])
+        groups[key][2].append(offset)
+    return list(groups.values())
+
+
+def write_3mf(parts, path, step=DEFAULT_STEP):
+    """
+    Export an assembly to a 3MF file, storing repeated geometry once.
+
+    `parts` is an iterable of (name, trimesh.Trimesh) in assembled pose.
+    Returns (unique_meshes, build_items).
+    """
+    groups = group_instances(parts, step)
+    objects = []
+    items = []
+    for object_id, (name, mesh, offsets) in enumerate(groups, start=1):
+        objects.append(
+            f'<object id="{object_id}" type="model" name="{_escape(name)}">'
+            f'{_mesh_xml(mesh, step)}</object>'
+        )
+        for x, y, z in np.round(offsets, 6).tolist():
+            items.append(
+                f'<item objectid="{object_id}" transform="1 0 0 0 1 0 0 0 1 {x} {y} {z}"/>'
+            )
+    model = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<model unit="millimeter" xml:lang="en-US" '
+        'xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">'
+        f'<resources>{"".join(objects)}</resources>'
+        f'<build>{"".join(items)}</build>'
+        '</model>'
+    )
+    # Fixed timestamps keep the package byte-identical for identical geometry
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, data in [
+            ('[Content_Types].xml', CONTENT_TYPES),
+            ('_rels/.rels', RELS),
+            ('3D/3dmodel.model', model),
+        ]:
+            info = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, data)
+    write_if_changed(path, buffer.getvalue())
+    return len(groups), len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Combine STL parts (in assembled pose) into an instanced 3MF.'
+    )
+    parser.add_argument('output', help='3MF file to write')
+    parser.add_argument('parts', nargs='+', help='STL files of the assembly')
+    args = parser.parse_args()
+
+    parts = [
+        (os.path.splitext(os.path.basename(path))[0], trimesh.load(path, force='mesh'))
+        for path in args.parts
+    ]
+    unique, items = write_3mf(parts, args.output)
+    print(f"Wrote {args.output}: {unique} unique meshes, {items} build items")
+
+
+if __name__ == '__main__':
+    main()